@@ -0,0 +1,63 @@
+import time
+import pandas as pd
+import streamlit as st
+from cache import response_cache
+from figure_cache import figure_cache_stats
+from store import read_usage
+from telemetry import FMP_DAILY_QUOTA, endpoint_stats, recent_calls, recent_runs, run_stats, reset, started_at
+
+
+def recent_table(records):
+    # Newest first, readable times; statuses mix HTTP codes and yfinance outcomes
+    table = pd.DataFrame(records[::-1])
+    if not table.empty:
+        table['at'] = pd.to_datetime(table['at'], unit='s')
+    if 'status' in table:
+        table['status'] = table['status'].astype(str)
+    return table
+
+
+st.title('Admin')
+st.markdown('''Outbound calls and cache use of this server process since it started (or was reset).
+            The FMP quota counts every process sharing the data store.''')
+
+fmp_calls = read_usage('fmp')
+endpoints = pd.DataFrame(endpoint_stats())
+runs = pd.DataFrame(run_stats())
+
+quota_column, calls_column, hit_rate_column, since_column = st.columns(4)
+quota_column.metric('FMP calls today (UTC)', f'{fmp_calls} / {FMP_DAILY_QUOTA}' if FMP_DAILY_QUOTA else fmp_calls)
+if endpoints.empty:
+    calls_column.metric('Network calls', 0)
+    hit_rate_column.metric('Cache hit rate', 'n/a')
+else:
+    hits = endpoints[[column for column in endpoints if column.endswith('_hits')]].to_numpy().sum()
+    calls_column.metric('Network calls', int(endpoints['calls'].sum()))
+    hit_rate_column.metric('Cache hit rate', f"{hits / (hits + endpoints['calls'].sum()):.1%}")
+since_column.metric('Collecting for', f'{(time.time() - started_at()) / 60:.0f} min')
+if FMP_DAILY_QUOTA:
+    st.progress(min(fmp_calls / FMP_DAILY_QUOTA, 1.0))
+
+st.subheader('Endpoints')
+if endpoints.empty:
+    st.info('No requests yet.')
+else:
+    st.dataframe(endpoints.assign(statuses=endpoints['statuses'].map(str), hit_rate=endpoints['hit_rate'] * 100), hide_index=True,
+                 column_config={name: st.column_config.NumberColumn(format='%.1f') for name in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_kb', 'hit_rate')})
+
+st.subheader('Reruns per page')
+if runs.empty:
+    st.info('No reruns recorded yet.')
+else:
+    st.dataframe(runs, hide_index=True)
+
+with st.expander('Recent calls'):
+    st.dataframe(recent_table(recent_calls()), hide_index=True)
+with st.expander('Recent reruns'):
+    st.dataframe(recent_table(recent_runs()), hide_index=True)
+with st.expander('In-memory caches'):
+    st.json({'responses': response_cache.stats(), 'figures': figure_cache_stats()})
+
+if st.button('Reset statistics'):
+    reset()
+    st.rerun()
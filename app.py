@@ -1,5 +1,13 @@
+import os
+import time
 import streamlit as st
 import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner_utils.exceptions import RerunException, StopException
+from run_memo import begin_run
+from refresh_snapshots import start_background_refresh
+from store import flush_usage
+from telemetry import record_run, setup_logging
+from profiling import finish_profile, profiling_requested, show_profile, start_profile
 
 st.set_page_config(page_title='Stockly', page_icon=':bar_chart:', layout='wide')
 
@@ -14,9 +22,43 @@ pages = {
         st.Page("financial_health.py", title="Financial Health Metrics"),
     ],
 }
+# Call statistics and quota use of this process, see telemetry.py
+if os.environ.get('STOCKLY_ADMIN'):
+    pages["Admin"] = [st.Page("admin.py", title="Admin")]
+
+setup_logging()
+if os.environ.get('STOCKLY_REFRESH_IN_APP'):
+    start_background_refresh()
 
 pg = st.navigation(pages, position="sidebar", expanded=True)
-pg.run()
+run_memo = begin_run()
+# ?profile (or STOCKLY_PROFILE) adds a waterfall of this rerun's fetch, compute and render time
+profile = start_profile(pg.title) if profiling_requested() else None
+run_started = time.perf_counter()
+# st.rerun() and st.stop() end the page with an exception too; those runs are recorded as well
+run_status = 'ok'
+try:
+    pg.run()
+except RerunException:
+    run_status = 'rerun'
+    raise
+except StopException:
+    run_status = 'stopped'
+    raise
+except Exception:
+    run_status = 'error'
+    raise
+finally:
+    record_run(pg.title, time.perf_counter() - run_started, run_memo, run_status)
+    flush_usage()
+    if profile is not None:
+        finish_profile(profile)
+        # A page that failed is when the waterfall matters most; a rerun or stop replaces the page anyway
+        if run_status in ('ok', 'error'):
+            show_profile(profile)
+
+if os.environ.get('STOCKLY_DEBUG') or 'debug' in st.query_params:
+    st.sidebar.caption(f'Network calls this run: {run_memo.network_calls}')
 
 # symbol = st.text_input('Enter a stock symbol:', 'AAPL')
 
@@ -0,0 +1,31 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent outbound fetches for the whole process
+MAX_WORKERS = int(os.environ.get('STOCKLY_FETCH_WORKERS', 8))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='stockly-fetch')
+
+
+def parse_symbols(text):
+    return [symbol.strip() for symbol in text.split(',') if symbol.strip()]
+
+
+def fetch_all(calls):
+    # calls is a list of (function, *args) tuples; results come back in the same order.
+    # Each call runs in a copy of the caller's context so it shares the rerun memo.
+    futures = [_executor.submit(contextvars.copy_context().run, call[0], *call[1:]) for call in calls]
+    return [future.result() for future in futures]
+
+
+def fetch_many(fetcher, symbols, *args):
+    return fetch_all([(fetcher, symbol, *args) for symbol in symbols])
+
+
+def fetch_many_with_ttm(fetcher, ttm_fetcher, symbols, period):
+    results = fetch_all(
+        [(fetcher, symbol, period) for symbol in symbols] +
+        [(ttm_fetcher, symbol) for symbol in symbols]
+    )
+    return list(zip(results[:len(symbols)], results[len(symbols):]))
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import functions
+from streamlit.testing.v1 import AppTest
+
+# Renders financial_statements.py against synthetic yfinance frames shaped like the real
+# ones (same row keys, 5 yearly / 7 quarterly columns), comparing the old per-cell
+# formatting with the vectorized path.
+# Usage: python benchmarks/bench_financial_statements.py [repeats]
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+
+def synthetic_statement(labels, freq):
+    columns = 5 if freq == 'yearly' else 7
+    dates = pd.date_range(end='2024-09-30', periods=columns, freq='YE-SEP' if freq == 'yearly' else 'QE-SEP')[::-1]
+    rng = np.random.default_rng(len(labels) + columns)
+    values = rng.normal(0, 5e10, (len(labels), columns))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(values, index=list(labels), columns=dates)
+
+
+class SyntheticTicker:
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def get_income_stmt(self, freq='yearly'):
+        return synthetic_statement(functions.YF_INCOME_STATEMENT_LABELS, freq)
+
+    def get_balance_sheet(self, freq='yearly'):
+        return synthetic_statement(functions.YF_BALANCE_SHEET_LABELS, freq)
+
+    def get_cashflow(self, freq='yearly'):
+        return synthetic_statement(functions.YF_CASHFLOW_LABELS, freq)
+
+
+def legacy_format_yf_statement(dataframe, labels, timeframe):
+    # The previous implementation: rename, then one Python format call per cell
+    dataframe = dataframe.copy()
+    dataframe.columns = dataframe.columns.strftime('%Y-%m-%d')
+    dataframe.rename(index=dict(labels), inplace=True)
+    dataframe = dataframe.map(lambda x: '{:,.0f}'.format(x) if pd.notnull(x) else x)
+    return dataframe.drop(columns=dataframe.columns[-functions.YF_DROPPED_COLUMNS[timeframe]:])
+
+
+def time_formatters():
+    ticker = SyntheticTicker('AAPL')
+    statements = [
+        ('Income Statement', ticker.get_income_stmt, functions.YF_INCOME_STATEMENT_LABELS),
+        ('Balance Sheet', ticker.get_balance_sheet, functions.YF_BALANCE_SHEET_LABELS),
+        ('Cash Flow', ticker.get_cashflow, functions.YF_CASHFLOW_LABELS),
+    ]
+    for timeframe, freq in functions.YF_PERIODS.items():
+        for name, get_frame, labels in statements:
+            frame = get_frame(freq)
+            for label, formatter in (('before', legacy_format_yf_statement), ('after', functions.format_yf_statement)):
+                start = time.perf_counter()
+                for _ in range(REPEATS * 20):
+                    formatter(frame, labels, timeframe)
+                elapsed = (time.perf_counter() - start) / (REPEATS * 20)
+                print(f'format  {timeframe:<9} {name:<16} {label:<6} {elapsed * 1000:8.3f} ms')
+
+
+def time_page(formatter):
+    functions.format_yf_statement = formatter
+    timings = {}
+    for timeframe in functions.YF_PERIODS:
+        runs = []
+        for _ in range(REPEATS):
+            app = AppTest.from_file(os.path.join(ROOT, 'financial_statements.py'), default_timeout=60)
+            app.session_state['symbol'] = 'AAPL'
+            app.run()
+            if timeframe != 'Yearly':
+                app.selectbox[0].set_value(timeframe)
+            start = time.perf_counter()
+            app.run()
+            runs.append(time.perf_counter() - start)
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+        timings[timeframe] = min(runs)
+    return timings
+
+
+if __name__ == '__main__':
+    yf.Ticker = SyntheticTicker
+    vectorized = functions.format_yf_statement
+    time_formatters()
+    before = time_page(legacy_format_yf_statement)
+    after = time_page(vectorized)
+    for timeframe in functions.YF_PERIODS:
+        print(f'page    {timeframe:<9} all three tabs   before {before[timeframe] * 1000:8.1f} ms   after {after[timeframe] * 1000:8.1f} ms')
@@ -0,0 +1,218 @@
+import argparse
+import inspect
+import json
+import math
+import re
+import statistics
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import functions
+import statements
+from figure_cache import clear_figures
+from metrics import METRICS
+
+# Times every extractor and plot builder in functions.py on synthetic payloads of growing
+# size, and fits how each one scales: an exponent near 1 is linear in the input, above
+# that it is worth a look. Functions that fetch (they take a symbol and nothing to work
+# on) are skipped. The figure cache is cleared before every call and the synthetic payloads
+# are not in the response cache, so each timing is a cold build and parse.
+# Usage: python benchmarks/bench_functions.py [--repeats 3] [--filter segments] [--quick]
+#                                             [--format table|json|jsonl] [--output results.json]
+# Sizes per axis: quarters of statement history, symbols in a comparison, revenue segments
+AXES = {
+    'quarters': [20, 40, 80, 160],
+    'symbols': [10, 50, 100, 500],
+    'segments': [10, 50, 200, 500],
+}
+QUICK_AXES = {name: sizes[:2] for name, sizes in AXES.items()}
+COMPARISON_QUARTERS = 40
+SEGMENT_QUARTERS = 48
+TRADING_DAYS_PER_QUARTER = 63
+SUPERLINEAR = 1.2
+
+
+def quarter_dates(count):
+    return pd.date_range(end='2024-09-30', periods=count, freq='QE-SEP')[::-1].strftime('%Y-%m-%d').to_numpy(dtype=str)
+
+
+def statement_payload(dataset, quarters, seed):
+    # Rows carry every field the metrics read from the dataset, newest first like FMP
+    rng = np.random.default_rng(seed)
+    fields = {spec['field'] for spec in METRICS.values() if spec['dataset'] == dataset}
+    fields |= {'revenue', 'netIncome', 'operatingIncome', 'growthRevenue', 'growthNetIncome', 'growthOperatingIncome'}
+    return [
+        {'date': date, 'symbol': 'BENCH', 'period': 'Q', **{field: float(rng.normal(1e9, 3e8)) for field in sorted(fields)}}
+        for date in quarter_dates(quarters)
+    ]
+
+
+def ttm_payload(dataset, seed):
+    rng = np.random.default_rng(seed)
+    return [{spec['ttm_field']: float(rng.normal(1, 0.3)) for spec in METRICS.values() if spec['dataset'] == dataset and spec['ttm_field']}]
+
+
+def metric_series(quarters, seed):
+    rng = np.random.default_rng(seed)
+    return statements.MetricSeries('value', quarter_dates(quarters), rng.normal(1e9, 3e8, quarters))
+
+
+def segment_payload(segments, quarters, seed):
+    # Every quarter reports a random three quarters of the segments, as real payloads skip some
+    rng = np.random.default_rng(seed)
+    names = [f'Segment {i}' for i in range(segments)]
+    return [
+        {date: {name: float(rng.uniform(1e8, 1e10)) for name in names if rng.random() < 0.75}}
+        for date in quarter_dates(quarters)
+    ]
+
+
+def earnings_list(quarters, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {'date': date, 'eps': float(eps), 'epsEstimate': float(eps * 0.97), 'surprisePercent': 3.1,
+         'revenue': float(eps * 1e10), 'revenueEstimate': float(eps * 9.8e9)}
+        for date, eps in zip(quarter_dates(quarters), rng.uniform(0.5, 2.5, quarters))
+    ]
+
+
+def price_frame(days, seed):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2024-09-30', periods=days, tz='America/New_York')
+    return pd.DataFrame({'Close': 50 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))}, index=index)
+
+
+DATASET_PARAMETERS = {
+    'income_statement': 'income_statement',
+    'income_statement_growth': 'income_statement_growth',
+    'financial_ratios': 'financial_ratios',
+    'key_metrics': 'key_metrics',
+    'cash_flow': 'cash_flow',
+}
+
+
+def make_argument(parameter, axis, size):
+    # Synthetic value for a parameter of a functions.py helper, by parameter name
+    quarters = size if axis == 'quarters' else COMPARISON_QUARTERS
+    if parameter == 'symbol':
+        return 'BENCH'
+    if parameter == 'title':
+        return 'BENCH Benchmark Over Time'
+    if parameter == 'symbol_list':
+        return [f'S{i}' for i in range(size)]
+    if parameter.endswith('_comparison_list'):
+        return [metric_series(quarters, i) for i in range(size)]
+    if parameter == 'earnings_history_list':
+        return earnings_list(quarters, 1)
+    if parameter.endswith('_list'):
+        return metric_series(quarters, len(parameter))
+    if parameter in ('revenue_segments', 'revenue_geo_segments'):
+        return segment_payload(size, SEGMENT_QUARTERS, 2)
+    if parameter == 'employee_count':
+        return [{'symbol': 'BENCH', 'filingDate': date, 'employeeCount': 1000 + i} for i, date in enumerate(quarter_dates(quarters))]
+    if parameter == 'stock_prices':
+        return price_frame(quarters * TRADING_DAYS_PER_QUARTER, 3)
+    if parameter in DATASET_PARAMETERS:
+        return statement_payload(DATASET_PARAMETERS[parameter], quarters, len(parameter))
+    if parameter.endswith('_ttm') and parameter[:-4] in DATASET_PARAMETERS:
+        return ttm_payload(DATASET_PARAMETERS[parameter[:-4]], 4)
+    raise KeyError(parameter)
+
+
+def benchmark_targets():
+    # (name, function, required parameters, axis) for every helper that works on payloads
+    targets = []
+    for name, function in vars(functions).items():
+        if not inspect.isfunction(function) or function.__module__ != 'functions':
+            continue
+        parameters = [p.name for p in inspect.signature(function).parameters.values() if p.default is inspect.Parameter.empty]
+        if not parameters or set(parameters) <= {'symbol', 'period', 'timeframe', 'query'}:
+            continue
+        try:
+            for parameter in parameters:
+                make_argument(parameter, 'quarters', 1)
+        except KeyError:
+            continue
+        if 'symbol_list' in parameters:
+            axis = 'symbols'
+        elif {'revenue_segments', 'revenue_geo_segments'} & set(parameters):
+            axis = 'segments'
+        else:
+            axis = 'quarters'
+        targets.append((name, getattr(function, '__wrapped__', function), parameters, axis))
+    return targets
+
+
+def time_call(function, arguments, repeats):
+    timings = []
+    for _ in range(repeats):
+        clear_figures()
+        started = time.perf_counter()
+        function(*arguments)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def scaling_exponent(points):
+    # Least-squares slope of log(time) against log(size)
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(max(seconds, 1e-9)) for _, seconds in points]
+    x_mean, y_mean = statistics.fmean(xs), statistics.fmean(ys)
+    spread = sum((x - x_mean) ** 2 for x in xs)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / spread if spread else 0.0
+
+
+def run(axes, repeats, pattern=None):
+    results = []
+    for name, function, parameters, axis in benchmark_targets():
+        if pattern and not re.search(pattern, name):
+            continue
+        points = []
+        for size in axes[axis]:
+            arguments = [make_argument(parameter, axis, size) for parameter in parameters]
+            timings = time_call(function, arguments, repeats)
+            points.append((size, statistics.median(timings)))
+            yield {'kind': 'timing', 'function': name, 'axis': axis, 'size': size,
+                   'median_seconds': statistics.median(timings), 'min_seconds': min(timings), 'repeats': repeats}
+        exponent = scaling_exponent(points)
+        yield {'kind': 'scaling', 'function': name, 'axis': axis, 'exponent': exponent,
+               'superlinear': exponent > SUPERLINEAR, 'largest_seconds': points[-1][1]}
+
+
+def format_record(record):
+    if record['kind'] == 'timing':
+        return f"{record['function']:<44} {record['axis']:<9} {record['size']:>5} {record['median_seconds'] * 1000:10.3f} ms"
+    flag = '  SUPERLINEAR' if record['superlinear'] else ''
+    return f"{record['function']:<44} {record['axis']:<9} scales as n^{record['exponent']:.2f}{flag}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scaling microbenchmarks for the functions.py helpers.')
+    parser.add_argument('--repeats', type=int, default=3, help='calls per size; the median is reported')
+    parser.add_argument('--filter', help='only functions whose name matches this regular expression')
+    parser.add_argument('--quick', action='store_true', help='only the two smallest sizes per axis')
+    parser.add_argument('--format', choices=('table', 'json', 'jsonl'), default='table')
+    parser.add_argument('--output', help='also write all records to this JSON file')
+    args = parser.parse_args()
+
+    records = []
+    for record in run(QUICK_AXES if args.quick else AXES, args.repeats, args.filter):
+        records.append(record)
+        if args.format == 'table':
+            print(format_record(record), flush=True)
+        elif args.format == 'jsonl':
+            print(json.dumps(record), flush=True)
+
+    report = {'python': sys.version.split()[0], 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'axes': QUICK_AXES if args.quick else AXES, 'records': records}
+    if args.format == 'json':
+        print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
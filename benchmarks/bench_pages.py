@@ -0,0 +1,280 @@
+import argparse
+import functools
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# End-to-end render time of every Streamlit page, driven headlessly through AppTest against
+# benchmarks/standin_server.py, so no API quota or network is involved. Each page and period
+# selection runs in a fresh process with an empty store: the first run is the cold load, the
+# following runs are new sessions of the same process (warm caches). Per scenario it reports
+# wall time, requests sent to the stand-in, time spent building Plotly figures and how far the
+# cold run raised the process's resident memory above what it held before the page ran.
+# Non-default periods are measured on the rerun that follows switching the period selector.
+# --check only compares against a baseline recorded with the same --repeats and --latency.
+# Usage: python benchmarks/bench_pages.py [--repeats 7] [--latency 0.05] [--pages valuation.py]
+#        python benchmarks/bench_pages.py --save-baseline    # record benchmarks/baseline_pages.json
+#        python benchmarks/bench_pages.py --check            # exit 1 on a regression against it
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pages.json')
+SYMBOL = 'AAPL'
+# page -> period selections; None is the page's default
+SCENARIOS = {
+    'stock.py': [None, 'max'],
+    'financial_statements.py': [None, 'Quarterly'],
+    'profitability.py': [None, 'Quarter'],
+    'valuation.py': [None, 'Quarter'],
+    'financial_health.py': [None, 'Quarter'],
+}
+# Relative slowdown of a timing, and absolute increase in requests, counted as a regression
+TIME_TOLERANCE = 0.25
+REQUEST_TOLERANCE = 0
+# Cold runs are single samples; smaller slowdowns than this are noise
+NOISE_FLOOR = 0.05
+REPEATS = 7
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def stand_in_requests(base_url):
+    with urllib.request.urlopen(f'{base_url}/_stats') as response:
+        stats = json.load(response)
+    return sum(stats['requests'].values()) + stats['errors']
+
+
+class FigureTimer:
+    # Wraps every plot_* builder; nested builders only count once
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self._depth = threading.local()
+
+    def wrap(self, plot):
+        @functools.wraps(plot)
+        def timed(*args, **kwargs):
+            depth = getattr(self._depth, 'value', 0)
+            self._depth.value = depth + 1
+            started = time.perf_counter()
+            try:
+                return plot(*args, **kwargs)
+            finally:
+                self._depth.value = depth
+                if depth == 0:
+                    self.seconds += time.perf_counter() - started
+                    self.calls += 1
+        return timed
+
+    def install(self, *modules):
+        for module in modules:
+            for name in dir(module):
+                if name.startswith('plot_') or name == 'stock_price_history_line':
+                    setattr(module, name, self.wrap(getattr(module, name)))
+
+
+def current_rss_mb():
+    # Resident memory right now; None where /proc is not available
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return None
+
+
+class RssSampler:
+    # Highest resident memory seen while the block runs. ru_maxrss would only give the
+    # process's high-water mark, which the imports have usually set before the page runs.
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.before = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def __enter__(self):
+        self.before = current_rss_mb()
+        self.peak = self.before
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._update()
+
+    @property
+    def growth(self):
+        return None if self.before is None else self.peak - self.before
+
+
+def run_page(page, period, base_url, figure_timer):
+    from streamlit.testing.v1 import AppTest
+    from figure_cache import figure_cache_stats
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=300)
+    app.session_state['symbol'] = SYMBOL
+    if page == 'stock.py' and period:
+        app.session_state['price_period'] = period
+    elif period:
+        app.run()
+        app.selectbox[0].set_value(period)
+
+    requests_before = stand_in_requests(base_url)
+    figure_seconds, figure_calls = figure_timer.seconds, figure_timer.calls
+    figures_built = figure_cache_stats()['misses']
+    started = time.perf_counter()
+    app.run()
+    wall = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f'{page}: {app.exception[0].message}')
+    return {
+        'wall_seconds': wall,
+        'requests': stand_in_requests(base_url) - requests_before,
+        'figure_seconds': figure_timer.seconds - figure_seconds,
+        'figure_calls': figure_timer.calls - figure_calls,
+        'figures_built': figure_cache_stats()['misses'] - figures_built,
+        'charts': len(app.get('plotly_chart')),
+    }
+
+
+def run_scenario(page, period, base_url, repeats):
+    # Runs inside the child process, see measure()
+    import functions
+    import metrics
+    figure_timer = FigureTimer()
+    figure_timer.install(functions, metrics)
+
+    with RssSampler() as rss:
+        cold = run_page(page, period, base_url, figure_timer)
+    cold['rss_before_mb'] = rss.before
+    cold['peak_rss_mb'] = rss.peak
+    cold['rss_growth_mb'] = rss.growth
+    warm_runs = [run_page(page, period, base_url, figure_timer) for _ in range(repeats)]
+    warm = {name: statistics.median(run[name] for run in warm_runs) for name in warm_runs[0]} if warm_runs else {}
+    return {'page': page, 'period': period or 'default', 'cold': cold, 'warm': warm}
+
+
+def measure(page, period, base_url, repeats):
+    # A fresh interpreter per scenario, so every cold run starts from empty in-memory caches
+    # and an empty store, and its memory growth belongs to that scenario alone
+    env = dict(os.environ, FMP_BASE_URL=base_url, YAHOO_BASE_URL=base_url, API_KEY=os.environ.get('API_KEY', 'benchmark'),
+               STOCKLY_DATA_DIR=tempfile.mkdtemp(prefix='stockly-bench-'))
+    env.pop('STOCKLY_REFRESH_IN_APP', None)
+    command = [sys.executable, os.path.abspath(__file__), '--scenario', page, period or '', '--base-url', base_url, '--repeats', str(repeats)]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(f'{page} {period or "default"} failed:\n{result.stderr[-2000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def scenario_key(result):
+    return f"{result['page']}:{result['period']}"
+
+
+def compare(results, baseline):
+    regressions = []
+    for result in results:
+        previous = baseline.get(scenario_key(result))
+        if previous is None:
+            continue
+        for phase in ('cold', 'warm'):
+            for name in ('wall_seconds', 'figure_seconds'):
+                old, new = previous.get(phase, {}).get(name), result[phase].get(name)
+                if old and new and new > old * (1 + TIME_TOLERANCE) and new - old > NOISE_FLOOR:
+                    regressions.append(f'{scenario_key(result)} {phase} {name}: {old:.3f} -> {new:.3f}')
+            old, new = previous.get(phase, {}).get('requests'), result[phase].get('requests')
+            if old is not None and new is not None and new > old + REQUEST_TOLERANCE:
+                regressions.append(f'{scenario_key(result)} {phase} requests: {old} -> {new}')
+    return regressions
+
+
+def format_result(result, baseline):
+    previous = baseline.get(scenario_key(result), {})
+    lines = []
+    for phase in ('cold', 'warm'):
+        run = result[phase]
+        if not run:
+            continue
+        line = (f"{result['page']:<24} {result['period']:<10} {phase:<5} {run['wall_seconds'] * 1000:9.1f} ms"
+                f"  {run['requests']:4.0f} requests  figures {run['figure_seconds'] * 1000:7.1f} ms ({run['figures_built']:.0f} built)")
+        if phase == 'cold' and run.get('rss_growth_mb') is not None:
+            line += f"  memory +{run['rss_growth_mb']:5.1f} MB (peak {run['peak_rss_mb']:.1f})"
+        old = previous.get(phase, {}).get('wall_seconds')
+        if old:
+            line += f"  [{(run['wall_seconds'] / old - 1) * 100:+.0f}% vs baseline]"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark end-to-end render time of the Streamlit pages.')
+    parser.add_argument('--pages', nargs='*', default=list(SCENARIOS), help='page scripts to run (default: all)')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='warm runs per scenario; the median is reported')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the stand-in adds to every response')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 when a scenario regressed')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--scenario', nargs=2, metavar=('PAGE', 'PERIOD'), help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario[0], args.scenario[1] or None, args.base_url, args.repeats)))
+        sys.exit(0)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            recorded = json.load(file)
+        # Medians over a different number of runs, or timings under another latency, are not comparable
+        mismatched = [f'{name} {recorded.get(name)} (baseline) != {value}' for name, value in
+                      (('repeats', args.repeats), ('latency', args.latency)) if recorded.get(name) != value]
+        if mismatched and args.check:
+            parser.error(f"{args.baseline} was recorded with different settings: {', '.join(mismatched)}")
+        baseline = {} if mismatched else recorded['scenarios']
+
+    from standin_server import start_in_background
+    base_url, server, _ = start_in_background(latency=args.latency)
+
+    results = []
+    for page in args.pages:
+        for period in SCENARIOS[page]:
+            result = measure(page, period, base_url, args.repeats)
+            results.append(result)
+            print(format_result(result, baseline), flush=True)
+    server.shutdown()
+
+    report = {
+        'python': sys.version.split()[0], 'platform': sys.platform, 'latency': args.latency, 'repeats': args.repeats,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'scenarios': {scenario_key(result): result for result in results},
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'Baseline written to {args.baseline}')
+
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if args.check and regressions:
+        sys.exit(1)
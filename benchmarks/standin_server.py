@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import METRICS
+from yahoo import frame_to_payload, frame_from_payload
+from functions import YF_INCOME_STATEMENT_LABELS, YF_BALANCE_SHEET_LABELS, YF_CASHFLOW_LABELS
+
+# Local stand-in for the FMP API and the Yahoo data the app reads, for benchmarks and load
+# tests that must not spend API quota or depend on the network. Point the app at it with
+#   FMP_BASE_URL=http://127.0.0.1:8765 YAHOO_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+# Responses are replayed from <fixtures>/<source>/<endpoint>/<key>.json. A missing fixture
+# is recorded from the real service with --record (FMP needs API_KEY), or else synthesized
+# deterministically from the symbol, so any symbol works offline.
+# Usage: python benchmarks/standin_server.py [--port 8765] [--latency 0.15 --jitter 0.05]
+#                                            [--error-rate 0.02 --error-status 503] [--record]
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FMP_UPSTREAM = 'https://financialmodelingprep.com/api'
+
+# FMP endpoint -> page_data dataset, for the fields a synthesized statement needs
+STATEMENT_DATASETS = {
+    'income-statement': 'income_statement',
+    'income-statement-growth': 'income_statement_growth',
+    'ratios': 'financial_ratios',
+    'key-metrics': 'key_metrics',
+    'cash-flow-statement': 'cash_flow',
+    'balance-sheet-statement': 'balance_sheet',
+    'enterprise-values': 'enterprise_values',
+}
+TTM_DATASETS = {'ratios-ttm': 'financial_ratios', 'key-metrics-ttm': 'key_metrics'}
+PRODUCT_SEGMENTS = ['iPhone', 'Mac', 'iPad', 'Services', 'Wearables, Home and Accessories']
+GEO_SEGMENTS = ['Americas', 'Europe', 'Greater China', 'Japan', 'Rest of Asia Pacific']
+
+
+def seeded(*parts):
+    return random.Random(zlib.crc32('/'.join(str(part) for part in parts).encode()))
+
+
+def report_dates(period, count):
+    end = pd.Timestamp('2024-09-30')
+    step = pd.DateOffset(months=3 if period == 'quarter' else 12)
+    return [(end - step * i).strftime('%Y-%m-%d') for i in range(count)]
+
+
+def synthesize_fmp(endpoint, symbol, period):
+    rng = seeded('fmp', endpoint, symbol, period)
+    if endpoint in STATEMENT_DATASETS:
+        fields = [spec['field'] for spec in METRICS.values() if spec['dataset'] == STATEMENT_DATASETS[endpoint]]
+        count = 120 if period == 'quarter' else 30
+        scale = rng.uniform(1e9, 1e11) if endpoint in ('income-statement', 'cash-flow-statement', 'balance-sheet-statement') else 1
+        return [
+            {'date': date, 'symbol': symbol, 'period': 'Q' if period == 'quarter' else 'FY',
+             **{field: round(rng.uniform(0.05, 1.5) * scale, 4) for field in fields}}
+            for date in report_dates(period, count)
+        ]
+    if endpoint in TTM_DATASETS:
+        fields = [spec['ttm_field'] for spec in METRICS.values() if spec['dataset'] == TTM_DATASETS[endpoint] and spec['ttm_field']]
+        return [{field: round(rng.uniform(0.05, 1.5), 4) for field in fields}]
+    if endpoint == 'historical/earning_calendar':
+        rows = []
+        for date in report_dates('quarter', 40):
+            eps_estimated = round(rng.uniform(0.5, 2.5), 2)
+            revenue_estimated = round(rng.uniform(5e9, 1e11))
+            rows.append({
+                'date': date, 'symbol': symbol, 'fiscalDateEnding': date,
+                'eps': round(eps_estimated * rng.uniform(0.9, 1.1), 2), 'epsEstimated': eps_estimated,
+                'revenue': round(revenue_estimated * rng.uniform(0.95, 1.05)), 'revenueEstimated': revenue_estimated,
+            })
+        return rows
+    if endpoint in ('revenue-product-segmentation', 'revenue-geographic-segmentation'):
+        names = PRODUCT_SEGMENTS if endpoint == 'revenue-product-segmentation' else GEO_SEGMENTS
+        return [{date: {name: round(rng.uniform(1e9, 5e10)) for name in names}} for date in report_dates(period, 12)]
+    if endpoint == 'historical/employee_count':
+        return [
+            {'symbol': symbol, 'filingDate': date, 'employeeCount': round(rng.uniform(1e4, 2e5))}
+            for date in report_dates('annual', 15)
+        ]
+    if endpoint == 'search':
+        return [{'symbol': symbol.upper(), 'name': f'{symbol.upper()} Inc.', 'currency': 'USD',
+                 'stockExchange': 'NASDAQ Global Select', 'exchangeShortName': 'NASDAQ'}]
+    if endpoint == 'stock/list':
+        return [{'symbol': f'SYM{i}', 'name': f'Synthetic Company {i}', 'price': 10.0,
+                 'exchange': 'NASDAQ Global Select', 'exchangeShortName': 'NASDAQ', 'type': 'stock'} for i in range(5000)]
+    return []
+
+
+def synthesize_yahoo(kind, symbol, freq):
+    rng = seeded('yahoo', kind, symbol, freq)
+    if kind == 'info':
+        price = rng.uniform(20, 500)
+        return {
+            'symbol': symbol, 'currency': 'USD', 'currentPrice': price, 'previousClose': price * 0.99,
+            'open': price * 0.995, 'dayLow': price * 0.98, 'dayHigh': price * 1.02, 'volume': rng.randint(1e6, 1e8),
+            'marketCap': price * 1e10, 'fiftyTwoWeekHigh': price * 1.3, 'fiftyTwoWeekLow': price * 0.7,
+            'profitMargins': 0.25, 'trailingPE': 30.0, 'forwardPE': 28.0, 'trailingEps': price / 30, 'forwardEps': price / 28,
+            'priceToBook': 40.0, 'dividendYield': 0.5, 'beta': 1.2, 'fiveYearAvgDividendYield': 0.6,
+            'fiftyDayAverage': price, 'twoHundredDayAverage': price * 0.95, 'enterpriseValue': price * 1.02e10,
+            'floatShares': 1e10, 'sharesOutstanding': 1e10, 'bookValue': 4.0, '52WeekChange': 0.2,
+            'SandP52WeekChange': 0.15, 'totalCash': 6e10, 'totalCashPerShare': 4.0, 'totalDebt': 1e11,
+        }
+    if kind in ('income_stmt', 'balance_sheet', 'cashflow'):
+        labels = {'income_stmt': YF_INCOME_STATEMENT_LABELS, 'balance_sheet': YF_BALANCE_SHEET_LABELS, 'cashflow': YF_CASHFLOW_LABELS}[kind]
+        count = 5 if freq == 'yearly' else 7
+        dates = pd.to_datetime(report_dates('quarter' if freq == 'quarterly' else 'annual', count))
+        values = np.array([[rng.uniform(-1e9, 1e11) for _ in dates] for _ in labels])
+        return frame_to_payload(pd.DataFrame(values, index=list(labels), columns=dates))
+    if kind == 'earnings_history':
+        dates = pd.to_datetime(report_dates('quarter', 4)[::-1])
+        estimate = np.array([rng.uniform(0.5, 2.5) for _ in dates])
+        actual = estimate * np.array([rng.uniform(0.9, 1.1) for _ in dates])
+        frame = pd.DataFrame({'epsActual': actual, 'epsEstimate': estimate, 'epsDifference': actual - estimate,
+                              'surprisePercent': actual / estimate - 1}, index=dates)
+        return frame_to_payload(frame)
+    return None
+
+
+def synthesize_history(symbol):
+    rng = np.random.default_rng(zlib.crc32(f'history/{symbol}'.encode()))
+    dates = pd.bdate_range('1995-01-03', pd.Timestamp.now().normalize(), tz='America/New_York')
+    closes = rng.uniform(5, 50) * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(dates))))
+    opens = closes * (1 + rng.normal(0, 0.005, len(dates)))
+    return pd.DataFrame({
+        'Open': opens, 'High': np.maximum(opens, closes) * 1.01, 'Low': np.minimum(opens, closes) * 0.99, 'Close': closes,
+        'Volume': rng.integers(1e6, 1e8, len(dates)), 'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=dates)
+
+
+def slice_history(frame, period, start, end):
+    if start:
+        frame = frame[frame.index >= pd.Timestamp(start, tz=frame.index.tz)]
+    if end:
+        frame = frame[frame.index < pd.Timestamp(end, tz=frame.index.tz)]
+    if period and period != 'max' and not start:
+        offsets = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+        number, unit = re.match(r'(\d+)(\w+)', period).groups()
+        if unit in offsets:
+            frame = frame[frame.index >= frame.index[-1] - pd.DateOffset(**{offsets[unit]: int(number)})]
+    return frame
+
+
+class StandIn:
+    def __init__(self, fixtures_dir, latency, jitter, error_rate, error_status, record):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.record = record
+        self.rng = random.Random()
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.errors = 0
+        # Parsed full price histories, so a history request only costs the slice
+        self.histories = {}
+
+    def fixture_path(self, source, endpoint, key):
+        return os.path.join(self.fixtures_dir, source, endpoint.replace('/', '_'), re.sub(r'[^\w.=-]', '_', key) + '.json')
+
+    def load(self, source, endpoint, key, produce):
+        # Replay the fixture, or record/synthesize it once and replay it from then on
+        path = self.fixture_path(source, endpoint, key)
+        if os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        payload = produce()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+        return payload
+
+    def fmp(self, path, query):
+        # /v3/<endpoint>/<SYMBOL>?period=... or /v4/<endpoint>?symbol=...
+        version, rest = path.strip('/').split('/', 1)
+        symbol = query.get('symbol') or query.get('query')
+        if symbol is None and rest not in ('stock/list',):
+            rest, symbol = rest.rsplit('/', 1)
+        endpoint = rest
+        period = query.get('period')
+        key = '-'.join(part for part in (symbol, period) if part) or 'all'
+
+        def produce():
+            if self.record:
+                from http_client import http_get
+                params = '&'.join(f'{name}={value}' for name, value in query.items() if name != 'apikey')
+                upstream = f"{FMP_UPSTREAM}/{path.strip('/')}?{params}&apikey={os.environ.get('API_KEY')}"
+                return http_get(upstream).json()
+            return synthesize_fmp(endpoint, symbol or '', period)
+
+        payload = self.load('fmp', endpoint, key, produce)
+        if isinstance(payload, list) and query.get('limit', '').isdigit():
+            payload = payload[:int(query['limit'])]
+        return endpoint, payload
+
+    def yahoo(self, path, query):
+        # /yahoo/<kind>/<SYMBOL>?freq=... ; history is stored in full and sliced per request
+        _, kind, symbol = path.strip('/').split('/')
+        if kind == 'history':
+            def produce_history():
+                if self.record:
+                    import yfinance as yf
+                    return frame_to_payload(yf.Ticker(symbol).history(period='max'))
+                return frame_to_payload(synthesize_history(symbol))
+
+            frame = self.histories.get(symbol)
+            if frame is None:
+                frame = frame_from_payload(self.load('yahoo', 'history', symbol, produce_history))
+                self.histories[symbol] = frame
+            frame = slice_history(frame, query.get('period'), query.get('start'), query.get('end'))
+            return 'yahoo/history', frame_to_payload(frame)
+
+        freq = query.get('freq')
+
+        def produce():
+            if self.record:
+                import yfinance as yf
+                ticker = yf.Ticker(symbol)
+                if kind == 'info':
+                    return ticker.get_info()
+                method = getattr(ticker, f'get_{kind}')
+                return frame_to_payload(method(freq=freq) if freq else method())
+            return synthesize_yahoo(kind, symbol, freq)
+
+        key = '-'.join(part for part in (symbol, freq) if part)
+        return f'yahoo/{kind}', self.load('yahoo', kind, key, produce)
+
+    def respond(self, url):
+        parts = urlsplit(url)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        if parts.path == '/_stats':
+            with self.lock:
+                return 200, {'requests': dict(self.requests), 'errors': self.errors}
+        delay = self.latency + self.rng.gauss(0, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            with self.lock:
+                self.errors += 1
+            return self.error_status, {'Error Message': 'Injected error from the stand-in server.'}
+        if parts.path.startswith('/yahoo/'):
+            endpoint, payload = self.yahoo(parts.path, query)
+        else:
+            endpoint, payload = self.fmp(parts.path, query)
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        return (200, payload) if payload is not None else (404, {'Error Message': 'Unknown endpoint.'})
+
+
+def make_handler(standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            try:
+                status, payload = standin.respond(self.path)
+            except Exception as err:
+                status, payload = 500, {'Error Message': str(err)}
+            body = json.dumps(payload, separators=(',', ':')).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if status == 429:
+                self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8765, fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, record=False):
+    standin = StandIn(fixtures_dir, latency, jitter, error_rate, error_status, record)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(standin))
+    server.daemon_threads = True
+    return server, standin
+
+
+def start_in_background(**kwargs):
+    # For benchmarks: serve from a daemon thread on a free port, returns (base_url, server, standin)
+    server, standin = serve(port=kwargs.pop('port', 0), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True, name='stockly-standin').start()
+    return f'http://127.0.0.1:{server.server_address[1]}', server, standin
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded FMP and Yahoo responses locally.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='fixture directory (default: benchmarks/fixtures)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='standard deviation of the added latency, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--record', action='store_true', help='record missing fixtures from FMP (API_KEY) and Yahoo')
+    args = parser.parse_args()
+    server, _ = serve(args.port, args.fixtures, args.latency, args.jitter, args.error_rate, args.error_status, args.record)
+    print(f'Serving on http://127.0.0.1:{args.port} from {args.fixtures}', flush=True)
+    server.serve_forever()
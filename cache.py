@@ -0,0 +1,217 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from run_memo import current_run
+from telemetry import fetching, payload_size, record_cache
+from profiling import span
+
+# How long (in seconds) a response from each FMP endpoint is served from memory.
+# TTM figures move with the share price, statements only change on new filings.
+ENDPOINT_TTLS = {
+    'search': 60 * 60,
+    'stock-list': 24 * 60 * 60,
+    'income-statement': 24 * 60 * 60,
+    'income-statement-growth': 24 * 60 * 60,
+    'balance-sheet-statement': 24 * 60 * 60,
+    'cash-flow-statement': 24 * 60 * 60,
+    'ratios': 24 * 60 * 60,
+    'ratios-ttm': 15 * 60,
+    'key-metrics': 24 * 60 * 60,
+    'key-metrics-ttm': 15 * 60,
+    'enterprise-values': 24 * 60 * 60,
+    'earning-calendar': 6 * 60 * 60,
+    'revenue-product-segmentation': 24 * 60 * 60,
+    'revenue-geographic-segmentation': 24 * 60 * 60,
+    'employee-count': 24 * 60 * 60,
+    # Yahoo Finance payloads, see yahoo.py
+    'yf-info': 5 * 60,
+    'yf-income-stmt': 24 * 60 * 60,
+    'yf-balance-sheet': 24 * 60 * 60,
+    'yf-cashflow': 24 * 60 * 60,
+    'yf-earnings-history': 6 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+
+class TTLCache:
+    # Bounded by entry count, by the total size passed to set(), or both (None for no bound)
+    def __init__(self, max_entries=512, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        # key -> (expires, value, values derived from value, size)
+        self._entries = OrderedDict()
+        # id(value) -> key, for derived(); an entry holds its value, so the id stays unique while it is cached
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry[3]
+        if self._keys.get(id(entry[1])) == key:
+            del self._keys[id(entry[1])]
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _over_bound(self):
+        return ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self.bytes > self.max_bytes))
+
+    def set(self, key, value, ttl, size=0):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, {}, size)
+            self._keys[id(value)] = key
+            self.bytes += size
+            # Least recently used first; a value larger than max_bytes evicts itself too
+            while self._over_bound():
+                self._remove(next(iter(self._entries)))
+
+    def derived(self, value, name, compute):
+        # compute(value), kept in the entry that holds value so it expires and is evicted
+        # with it; computed every time for values that are not in the cache
+        with self._lock:
+            key = self._keys.get(id(value))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and name in entry[2]:
+                return entry[2][name]
+        result = compute(value)
+        if entry is not None:
+            with self._lock:
+                entry[2][name] = result
+        return result
+
+    def invalidate(self, predicate=None):
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                self._keys.clear()
+                self.bytes = 0
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Responses are bounded by their size on the wire (or in the store), not by their count:
+# one long statement history weighs as much as hundreds of TTM quotes
+response_cache = TTLCache(None, int(float(os.environ.get('STOCKLY_CACHE_MB', 256)) * 1024 * 1024))
+
+# Fetches currently running, so concurrent callers asking for the same key share one request
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+# Lifetime the running fetch gave its result in place of the endpoint TTL, see expire_in
+_result_ttl = contextvars.ContextVar('stockly_result_ttl', default=None)
+# Bytes the running fetch received, see count_result_bytes
+_result_bytes = contextvars.ContextVar('stockly_result_bytes', default=None)
+# Set while the snapshot refresher revalidates: its fetches skip the memory copy and replace it
+_bypass_memory = contextvars.ContextVar('stockly_bypass_memory', default=False)
+
+
+def is_cacheable(data):
+    # FMP answers bad symbols with an empty list and bad keys/limits with an error dict,
+    # yfinance with an empty DataFrame
+    if hasattr(data, 'empty'):
+        return not data.empty
+    if not data:
+        return False
+    if isinstance(data, dict) and 'Error Message' in data:
+        return False
+    return True
+
+
+def expire_in(seconds):
+    # Called from inside a fetch: keep its result in memory for this long instead of the
+    # endpoint TTL, e.g. for a stored copy that is already part way through its lifetime
+    _result_ttl.set(seconds)
+
+
+def count_result_bytes(size):
+    # Called from inside a fetch with the size of what it received (a response body, a
+    # stored payload), which is what its cache entry is charged
+    if _result_bytes.get() is not None:
+        _result_bytes.set(_result_bytes.get() + size)
+
+
+@contextlib.contextmanager
+def bypassing_memory():
+    token = _bypass_memory.set(True)
+    try:
+        yield
+    finally:
+        _bypass_memory.reset(token)
+
+
+def cached_fetch(endpoint, symbol, period, fetch, ttl=None):
+    key = (endpoint, symbol, period)
+    run = current_run()
+    if run is not None and key in run.results:
+        record_cache(endpoint, symbol, 'run')
+        return run.results[key]
+
+    data = None if _bypass_memory.get() else response_cache.get(key)
+    if data is None:
+        data = _fetch_once(key, ttl or ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL), fetch)
+    else:
+        record_cache(endpoint, symbol, 'memory')
+    if run is not None:
+        run.results[key] = data
+    return data
+
+
+def _fetch_once(key, ttl, fetch):
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+    if not leader:
+        record_cache(key[0], key[1], 'coalesced')
+        return future.result()
+
+    token = _result_ttl.set(None)
+    size_token = _result_bytes.set(0)
+    try:
+        with fetching(key[0], key[1]), span('fetch', ' '.join(str(part) for part in key if part)):
+            data = fetch()
+        ttl = _result_ttl.get() or ttl
+        if is_cacheable(data):
+            response_cache.set(key, data, ttl, _result_bytes.get() or payload_size(data))
+        future.set_result(data)
+        return data
+    except BaseException as err:
+        future.set_exception(err)
+        raise
+    finally:
+        _result_ttl.reset(token)
+        _result_bytes.reset(size_token)
+        with _in_flight_lock:
+            del _in_flight[key]
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+
+# Roughly the plot area width of a full-width chart in the wide layout; drawing more
+# points than pixels only adds JSON and browser work without changing the picture
+CHART_POINTS = int(os.environ.get('STOCKLY_CHART_POINTS', 1000))
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from each bucket
+    # in between, the point forming the largest triangle with the previously kept point and
+    # the average of the next bucket. Returns the indices of the kept points.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    # Bucket boundaries for the inner points, plus running sums for the bucket averages
+    edges = (np.arange(threshold - 1) * bucket_size).astype(np.int64) + 1
+    edges[-1] = n - 1
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, (edges[i + 2] if i + 2 < threshold - 1 else n)
+        count = next_end - next_start
+        avg_x = (x_sums[next_end] - x_sums[next_start]) / count
+        avg_y = (y_sums[next_end] - y_sums[next_start]) / count
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+
+def downsample_series(index, values, max_points=CHART_POINTS):
+    # Returns (index, values) with at most max_points points; NaNs are dropped first
+    values = np.asarray(values, dtype=float)
+    if not max_points or len(values) <= max_points:
+        return index, values
+    finite = np.flatnonzero(np.isfinite(values))
+    x = index.asi8[finite] if hasattr(index, 'asi8') else np.asarray(index, dtype=float)[finite]
+    kept = finite[lttb_indices(x, values[finite], max_points)]
+    return index[kept], values[kept]
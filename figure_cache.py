@@ -0,0 +1,67 @@
+import functools
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from cache import TTLCache
+from profiling import span
+
+# Built Plotly figures shared by every session, keyed on the plot function and a hash of
+# the data it was given, so an unchanged chart is never rebuilt. New data means a new key;
+# the TTL only lets entries for symbols nobody looks at any more age out.
+FIGURE_TTL = 24 * 60 * 60
+_figures = TTLCache(int(os.environ.get('STOCKLY_FIGURE_CACHE_SIZE', 256)))
+
+
+def _update(digest, value):
+    if isinstance(value, (list, tuple)):
+        digest.update(b'[%d' % len(value))
+        for item in value:
+            _update(digest, item)
+        digest.update(b']')
+    elif isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif hasattr(value, 'dates') and hasattr(value, 'values'):
+        # MetricSeries
+        digest.update(str(value.name).encode())
+        _update(digest, value.dates)
+        _update(digest, value.values)
+    elif isinstance(value, dict):
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    else:
+        digest.update(f'{type(value).__name__}:{value!r}'.encode())
+    digest.update(b'|')
+
+
+def fingerprint(*values):
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+def cached_figure(plot):
+    # Callers must treat the returned figure as read-only: it is shared across sessions
+    @functools.wraps(plot)
+    def wrapper(*args, **kwargs):
+        key = (plot.__module__, plot.__qualname__, fingerprint(args, sorted(kwargs.items())))
+        figure = _figures.get(key)
+        if figure is None:
+            with span('figure', plot.__name__):
+                figure = plot(*args, **kwargs)
+            _figures.set(key, figure, FIGURE_TTL)
+        return figure
+    return wrapper
+
+
+def figure_cache_stats():
+    return _figures.stats()
+
+
+def clear_figures():
+    _figures.invalidate()
@@ -1,9 +1,9 @@
 import streamlit as st
-from functions import get_financial_ratios, get_financial_ratios_ttm, get_key_metrics, get_key_metrics_ttm, \
-                    get_debt_to_equity_ratio, plot_debt_to_equity_ratio, get_total_debt_to_cap, plot_total_debt_to_cap, \
+from functions import get_debt_to_equity_ratio, plot_debt_to_equity_ratio, get_total_debt_to_cap, plot_total_debt_to_cap, \
                     get_current_ratio, get_quick_ratio, plot_current_quick_ratio, plot_current_ratio, get_working_capital, \
                     plot_working_capital, get_capex_operating_cashflow, plot_capex_operating_cashflow, get_capex_per_share, \
-                    plot_capex_per_share, get_employee_count, plot_employee_count
+                    plot_capex_per_share, plot_employee_count
+from page_data import PAGE_PLANS, load_page_data
 
 st.title('Financial Health')
 st.markdown('''Analyse the financial health of a company by looking at key financial ratios.''')
@@ -17,10 +17,11 @@ if symbol_input:
 selected_period = st.selectbox('Select annual or quarter financial data', options=['Annual', 'Quarter'])
 period = selected_period.lower()
 
-financial_ratios = get_financial_ratios(symbol, period)
-financial_ratios_ttm = get_financial_ratios_ttm(symbol)
-key_metrics = get_key_metrics(symbol, period)
-key_metrics_ttm = get_key_metrics_ttm(symbol)
+page_data = load_page_data(PAGE_PLANS['financial_health'], symbol, period)
+financial_ratios = page_data['financial_ratios']
+financial_ratios_ttm = page_data['financial_ratios_ttm']
+key_metrics = page_data['key_metrics']
+key_metrics_ttm = page_data['key_metrics_ttm']
 
 # Current + Quick Ratio
 current_ratio_container = st.container()
@@ -63,6 +64,6 @@ capex_per_share_container.plotly_chart(capex_per_share_plot)
 
 # Employee Growth
 employee_growth_container = st.container()
-employee_count = get_employee_count(symbol)
+employee_count = page_data['employee_count']
 employee_count_plot = plot_employee_count(symbol, employee_count)
 employee_growth_container.plotly_chart(employee_count_plot)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cache import count_result_bytes
+from run_memo import count_network_call
+from telemetry import count_usage, current_fetch, record_call
+
+TIMEOUT = float(os.environ.get('FMP_TIMEOUT', 10))
+MAX_RETRIES = int(os.environ.get('FMP_MAX_RETRIES', 3))
+POOL_SIZE = int(os.environ.get('FMP_POOL_SIZE', 20))
+# Requests per minute allowed by the FMP plan
+RATE_LIMIT = int(os.environ.get('FMP_RATE_LIMIT', 300))
+
+
+class RateLimiter:
+    # Token bucket shared by every thread in the process
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class MeteredRetry(Retry):
+    # urllib3 resends 429 and 5xx responses (and failed connections) inside session.get.
+    # Every resend is another request against the plan, so inside http_get each one is
+    # recorded, waits for a rate limiter token and is counted like the first attempt.
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        _attempt.status = response.status if response is not None else type(error).__name__
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def sleep(self, response=None):
+        # Only called when urllib3 is about to resend; the last attempt is recorded by http_get
+        if getattr(_attempt, 'url', None) is not None:
+            finish_attempt(0, _attempt.status)
+        super().sleep(response)
+        if getattr(_attempt, 'url', None) is not None:
+            start_attempt()
+
+
+def create_session():
+    retry = MeteredRetry(
+        total=MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = create_session()
+rate_limiter = RateLimiter(RATE_LIMIT)
+# The http_get request running on this thread, for MeteredRetry
+_attempt = threading.local()
+
+
+def start_attempt():
+    rate_limiter.acquire()
+    count_network_call()
+    # Every FMP request counts against the plan, whatever it returned; store.flush_usage
+    # writes the counts to the usage table
+    count_usage('fmp')
+    _attempt.started = time.perf_counter()
+
+
+def finish_attempt(size, status):
+    endpoint, symbol = current_fetch()
+    record_call(endpoint or urlsplit(_attempt.url).path, symbol, time.perf_counter() - _attempt.started, size, status)
+
+
+def http_get(url, timeout=None):
+    _attempt.url = url
+    try:
+        start_attempt()
+        try:
+            response = session.get(url, timeout=timeout or TIMEOUT)
+        except requests.RequestException as err:
+            finish_attempt(0, type(err).__name__)
+            raise
+        finish_attempt(len(response.content), response.status_code)
+        count_result_bytes(len(response.content))
+        return response
+    finally:
+        _attempt.url = None
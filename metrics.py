@@ -0,0 +1,186 @@
+import plotly.graph_objects as go
+from statements import parse_statement
+from figure_cache import cached_figure
+from profiling import span
+
+BAR_COLOR = 'rgb(158,202,225)'
+COMPARISON_COLORS = ['rgb(158,202,225)', 'rgb(255,127,80)', 'rgb(34,139,34)', 'rgb(255,215,0)', 'rgb(75,0,130)']
+AXIS_FONT = dict(size=14, color='black')
+
+
+def metric(dataset, field, title, axis_title=None, ttm_field=None, label=None, trace_name=None,
+           chart='bar', color=BAR_COLOR, styled=True, since=None):
+    # title is used as '{symbol} {title} Over Time' and '{title} Comparison Over Time';
+    # axis_title doubles as the comparison trace suffix and label as the selectbox option
+    axis_title = axis_title or title
+    return {
+        'dataset': dataset,
+        'field': field,
+        'ttm_field': ttm_field,
+        'title': title,
+        'axis_title': axis_title,
+        'label': label or axis_title,
+        'trace_name': trace_name or axis_title,
+        'chart': chart,
+        'color': color,
+        'styled': styled,
+        'since': since,
+    }
+
+
+# Every single-series metric the pages plot. Adding a metric is a new entry here, not new code.
+# dataset names match page_data.DATASETS; a metric with a ttm_field also reads '<dataset>_ttm'.
+METRICS = {
+    'revenue': metric('income_statement', 'revenue', 'Revenue', styled=False),
+    'gross_profit': metric('income_statement', 'grossProfit', 'Gross Profit', styled=False),
+    'net_income': metric('income_statement', 'netIncome', 'Net Income', styled=False),
+    'operating_income': metric('income_statement', 'operatingIncome', 'Operating Income', styled=False),
+    'cost_of_revenue': metric('income_statement', 'costOfRevenue', 'Cost of Revenue', styled=False),
+    'revenue_growth': metric('income_statement_growth', 'growthRevenue', 'Revenue Growth'),
+    'net_income_growth': metric('income_statement_growth', 'growthNetIncome', 'Net Income Growth'),
+    'operating_income_growth': metric('income_statement_growth', 'growthOperatingIncome', 'Operating Income Growth'),
+    'free_cash_flow': metric('cash_flow', 'freeCashFlow', 'Free Cash Flow', styled=False),
+    'gross_profit_margin': metric('financial_ratios', 'grossProfitMargin', 'Gross Profit Margin',
+                                  ttm_field='grossProfitMarginTTM', since='1999'),
+    'net_income_margin': metric('financial_ratios', 'netProfitMargin', 'Net Income Margin',
+                                ttm_field='netProfitMarginTTM', color='rgb(255,127,80)', since='1999'),
+    'operating_profit_margin': metric('financial_ratios', 'operatingProfitMargin', 'Operating Profit Margin',
+                                      ttm_field='operatingProfitMarginTTM', color='rgb(34,139,34)', since='1999'),
+    'roe': metric('financial_ratios', 'returnOnEquity', 'Return on Equity', ttm_field='returnOnEquityTTM'),
+    'roa': metric('financial_ratios', 'returnOnAssets', 'Return on Assets', ttm_field='returnOnAssetsTTM'),
+    'roce': metric('financial_ratios', 'returnOnCapitalEmployed', 'Return on Capital Employed',
+                   ttm_field='returnOnCapitalEmployedTTM'),
+    'pe_ratio': metric('key_metrics', 'peRatio', 'Price to Earnings (PE) Ratio', 'PE Ratio', ttm_field='peRatioTTM'),
+    'peg_ratio': metric('financial_ratios', 'priceEarningsToGrowthRatio', 'Price to Earnings to Growth (PEG) Ratio',
+                        'PEG Ratio', ttm_field='priceEarningsToGrowthRatioTTM'),
+    'pb_ratio': metric('key_metrics', 'pbRatio', 'Price to Book (PB) Ratio', 'PB Ratio', ttm_field='pbRatioTTM'),
+    'ps_ratio': metric('key_metrics', 'priceToSalesRatio', 'Price to Sales (PS) Ratio', 'PS Ratio',
+                       ttm_field='priceToSalesRatioTTM'),
+    'price_to_fcf': metric('key_metrics', 'pfcfRatio', 'Price to Free Cash Flow (P/FCF)', 'P/FCF',
+                           ttm_field='pfcfRatioTTM', label='Price to FCF', trace_name='Price to FCF'),
+    'price_to_ocf': metric('key_metrics', 'pocfratio', 'Price to Operating Cash Flow (P/OCF)', 'P/OCF',
+                           ttm_field='pocfratioTTM', label='Price to OCF', trace_name='Price to Operating Cash Flow'),
+    'ev_ebitda': metric('key_metrics', 'enterpriseValueOverEBITDA', 'Enterprise Value to EBITDA (EV/EBITDA)', 'EV/EBITDA',
+                        ttm_field='enterpriseValueOverEBITDATTM', label='EV to EBITDA'),
+    'ev_to_sales': metric('key_metrics', 'evToSales', 'Enterprise Value to Sales (EV/Sales)', 'EV/Sales',
+                          ttm_field='evToSalesTTM', label='EV to Sales', trace_name='EV to Sales'),
+    'ev_to_ocf': metric('key_metrics', 'evToOperatingCashFlow', 'Enterprise Value to Operating Cash Flow (EV/OCF)', 'EV/OCF',
+                        ttm_field='evToOperatingCashFlowTTM', label='EV to OCF', trace_name='EV to Operating Cash Flow'),
+    'ev_to_fcf': metric('key_metrics', 'evToFreeCashFlow', 'Enterprise Value to Free Cash Flow (EV/FCF)', 'EV/FCF',
+                        ttm_field='evToFreeCashFlowTTM', label='EV to FCF', trace_name='EV to Free Cash Flow'),
+    'dividend_yield': metric('key_metrics', 'dividendYield', 'Dividend Yield', ttm_field='dividendYieldTTM'),
+    'debt_to_equity_ratio': metric('financial_ratios', 'debtEquityRatio', 'Debt to Equity Ratio',
+                                   ttm_field='debtEquityRatioTTM', chart='line'),
+    'total_debt_to_cap': metric('financial_ratios', 'totalDebtToCapitalization', 'Total Debt to Capitalization',
+                                ttm_field='totalDebtToCapitalizationTTM', chart='line'),
+    'current_ratio': metric('financial_ratios', 'currentRatio', 'Current Ratio', ttm_field='currentRatioTTM', chart='line'),
+    'quick_ratio': metric('financial_ratios', 'quickRatio', 'Quick Ratio', ttm_field='quickRatioTTM', chart='line'),
+    'working_capital': metric('key_metrics', 'workingCapital', 'Working Capital', ttm_field='workingCapitalTTM'),
+    'capex_operating_cashflow': metric('key_metrics', 'capexToOperatingCashFlow', 'Capex to Operating Cash Flow',
+                                       ttm_field='capexToOperatingCashFlowTTM', chart='line'),
+    'capex_per_share': metric('key_metrics', 'capexPerShare', 'Capex per Share', ttm_field='capexPerShareTTM', chart='line'),
+}
+
+VALUATION_METRICS = ['pe_ratio', 'peg_ratio', 'pb_ratio', 'ps_ratio', 'price_to_fcf', 'price_to_ocf', 'ev_ebitda',
+                     'ev_to_sales', 'ev_to_ocf', 'ev_to_fcf', 'dividend_yield']
+
+
+def metric_by_label(label, names=None):
+    for name in names or METRICS:
+        if METRICS[name]['label'] == label:
+            return name
+    raise KeyError(label)
+
+
+def metric_datasets(names):
+    # Dataset names needed to extract the given metrics, in first-use order
+    datasets = []
+    for name in names:
+        spec = METRICS[name]
+        datasets.append(spec['dataset'])
+        if spec['ttm_field']:
+            datasets.append(spec['dataset'] + '_ttm')
+    return list(dict.fromkeys(datasets))
+
+
+def extract_metric(name, data, data_ttm=None):
+    spec = METRICS[name]
+    with span('extract', name):
+        series = parse_statement(data).series(spec['field'], name)
+        if spec['ttm_field']:
+            series = series.with_ttm(data_ttm[0][spec['ttm_field']])
+    return series
+
+
+def extract_metrics(names, datasets):
+    # datasets maps dataset name -> payload, e.g. the dict returned by load_page_data
+    return {
+        name: extract_metric(name, datasets[METRICS[name]['dataset']], datasets.get(METRICS[name]['dataset'] + '_ttm'))
+        for name in names
+    }
+
+
+@cached_figure
+def plot_metric(name, symbol, metric_list):
+    spec = METRICS[name]
+    if spec['since']:
+        metric_list = metric_list.after(spec['since'])
+    dates = metric_list.dates[::-1]
+    values = metric_list.values[::-1]
+
+    fig = go.Figure()
+    if spec['chart'] == 'line':
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=values,
+            mode='lines+markers',
+            name=spec['trace_name'],
+            line=dict(color='blue', width=2),
+            marker=dict(size=6)
+        ))
+    else:
+        fig.add_trace(go.Bar(name=spec['trace_name'], x=dates, y=values, marker_color=spec['color'], width=0.25))
+
+    if spec['styled']:
+        axes = dict(
+            xaxis=dict(type='category', title_font=AXIS_FONT, tickfont=AXIS_FONT),
+            yaxis=dict(title_font=AXIS_FONT, tickfont=AXIS_FONT)
+        )
+    else:
+        axes = dict(xaxis=dict(type='category'))
+    fig.update_layout(
+        title=f"{symbol} {spec['title']} Over Time",
+        xaxis_title='Date',
+        yaxis_title=spec['axis_title'],
+        **axes
+    )
+
+    return fig
+
+
+@cached_figure
+def plot_metric_comparison(name, symbol_list, comparison_lists):
+    spec = METRICS[name]
+    fig = go.Figure()
+    for i, (symbol, comparison_list) in enumerate(zip(symbol_list, comparison_lists)):
+        filtered_comparison_list = comparison_list.after('2014')
+        fig.add_trace(go.Bar(
+            name=f"{symbol} {spec['axis_title']}",
+            x=filtered_comparison_list.years()[::-1],
+            y=filtered_comparison_list.values[::-1],
+            marker_color=COMPARISON_COLORS[i % len(COMPARISON_COLORS)]
+        ))
+
+    fig.update_layout(
+        title=f"{spec['title']} Comparison Over Time",
+        xaxis_title='Date',
+        yaxis_title=spec['axis_title'],
+        xaxis=dict(type='category', title_font=AXIS_FONT, tickfont=AXIS_FONT),
+        yaxis=dict(title_font=AXIS_FONT, tickfont=AXIS_FONT)
+    )
+
+    fig.update_traces(
+        width=0.25
+    )
+
+    return fig
@@ -0,0 +1,129 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import numpy as np
+import pandas as pd
+from store import DATA_DIR
+
+# Full ('max') daily histories on disk as one fixed-width .npy file per column:
+#   <ARCHIVE_DIR>/<SYMBOL>/<version>/{index,Open,High,Low,Close,Volume,...}.npy
+#   <ARCHIVE_DIR>/<SYMBOL>/current.json  -> which version is live, its tz and columns
+# Readers memory-map the columns, so every session and every worker process shares the
+# OS page cache for a symbol instead of holding its own DataFrame. Writers build a new
+# version directory and swap current.json atomically; mapped old versions stay readable.
+ARCHIVE_DIR = os.path.join(DATA_DIR, 'ohlcv')
+# Ticker symbols as Yahoo writes them (BRK-B, ^GSPC, EURUSD=X, AA.L); anything else could
+# name a path outside the symbol's own directory
+_SYMBOL = re.compile(r'[A-Z0-9^][A-Z0-9.^=&_-]*')
+_VERSION = re.compile(r'(\d+)-\d+')
+
+# Per process: symbol -> (version, frame backed by the mapped columns)
+_mapped = {}
+_mapped_lock = threading.Lock()
+
+
+def _symbol_dir(symbol):
+    name = (symbol or '').upper()
+    if not _SYMBOL.fullmatch(name):
+        raise ValueError(f'Not a ticker symbol: {symbol!r}')
+    return os.path.join(ARCHIVE_DIR, name)
+
+
+def _remove_tree(path):
+    # Last line of defence before deleting: the path must be the archive or inside it
+    root = os.path.realpath(ARCHIVE_DIR)
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f'Refusing to remove {path} outside {ARCHIVE_DIR}')
+    shutil.rmtree(resolved, ignore_errors=True)
+
+
+def _column_file(column):
+    return column.replace(' ', '_') + '.npy'
+
+
+def read_meta(symbol):
+    # None for symbols that were never archived, including ones that are not valid symbols
+    try:
+        with open(os.path.join(_symbol_dir(symbol), 'current.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def read_archive(symbol):
+    meta = read_meta(symbol)
+    if meta is None:
+        return None
+    with _mapped_lock:
+        cached = _mapped.get(symbol)
+        if cached is not None and cached[0] == meta['version']:
+            return cached[1], meta
+    version_dir = os.path.join(_symbol_dir(symbol), meta['version'])
+    try:
+        index = np.load(os.path.join(version_dir, 'index.npy'), mmap_mode='r')
+        columns = {column: np.load(os.path.join(version_dir, _column_file(column)), mmap_mode='r') for column in meta['columns']}
+    except (OSError, ValueError) as err:
+        print(f"An error occurred: {err}")
+        return None
+    # The tz-aware index is rebuilt in memory (8 bytes a row); the OHLCV columns stay mapped
+    dates = pd.DatetimeIndex(index.view('M8[ns]'), copy=False).tz_localize('UTC')
+    if meta['tz']:
+        dates = dates.tz_convert(meta['tz'])
+    frame = pd.DataFrame(columns, index=dates, copy=False)
+    with _mapped_lock:
+        _mapped[symbol] = (meta['version'], frame)
+    return frame, meta
+
+
+def write_archive(symbol, frame):
+    symbol_dir = _symbol_dir(symbol)
+    version = f'{time.time_ns()}-{os.getpid()}'
+    version_dir = os.path.join(symbol_dir, version)
+    os.makedirs(version_dir)
+    index = frame.index.tz_convert('UTC') if frame.index.tz is not None else frame.index
+    np.save(os.path.join(version_dir, 'index.npy'), index.as_unit('ns').asi8)
+    columns = []
+    for column in frame.columns:
+        values = frame[column].to_numpy()
+        dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+        np.save(os.path.join(version_dir, _column_file(column)), values.astype(dtype, copy=False))
+        columns.append(column)
+    meta = {
+        'version': version,
+        'tz': str(frame.index.tz) if frame.index.tz is not None else None,
+        'columns': columns,
+        'rows': len(frame),
+        'written_at': time.time(),
+    }
+    pointer = os.path.join(symbol_dir, 'current.json')
+    with open(pointer + '.' + version, 'w') as file:
+        json.dump(meta, file)
+    os.replace(pointer + '.' + version, pointer)
+    _remove_old_versions(symbol_dir, version)
+    archived = read_archive(symbol)
+    # None when another process replaced or removed the version in between; the bars are the same
+    return frame if archived is None else archived[0]
+
+
+def _remove_old_versions(symbol_dir, version):
+    # Only versions older than ours, so a newer one another process is still writing survives.
+    # Open mappings of a removed version stay valid on POSIX; elsewhere the delete just fails.
+    written_ns = int(_VERSION.fullmatch(version).group(1))
+    for name in os.listdir(symbol_dir):
+        match = _VERSION.fullmatch(name)
+        path = os.path.join(symbol_dir, name)
+        if match and os.path.isdir(path) and int(match.group(1)) < written_ns:
+            _remove_tree(path)
+
+
+def remove_archive(symbol=None):
+    with _mapped_lock:
+        if symbol is None:
+            _mapped.clear()
+        else:
+            _mapped.pop(symbol, None)
+    _remove_tree(ARCHIVE_DIR if symbol is None else _symbol_dir(symbol))
@@ -0,0 +1,60 @@
+from batch import fetch_all
+from functions import get_income_statement, get_income_statement_growth, get_financial_ratios, get_financial_ratios_ttm, \
+    get_key_metrics, get_key_metrics_ttm, cash_flow, get_product_revenue_segment, get_revenue_geo_segment, \
+    get_earnings_history, get_employee_count
+from metrics import metric_datasets, extract_metrics
+from profiling import span
+
+# Every dataset a page can ask for: name -> (fetcher, whether the fetcher takes the period)
+DATASETS = {
+    'income_statement': (get_income_statement, True),
+    'income_statement_growth': (get_income_statement_growth, True),
+    'financial_ratios': (get_financial_ratios, True),
+    'financial_ratios_ttm': (get_financial_ratios_ttm, False),
+    'key_metrics': (get_key_metrics, True),
+    'key_metrics_ttm': (get_key_metrics_ttm, False),
+    'cash_flow': (cash_flow, True),
+    'product_revenue_segments': (get_product_revenue_segment, True),
+    'geo_revenue_segments': (get_revenue_geo_segment, True),
+    'earnings_history': (get_earnings_history, False),
+    'employee_count': (get_employee_count, False),
+}
+
+PAGE_PLANS = {
+    'profitability': [
+        'income_statement', 'income_statement_growth', 'financial_ratios', 'financial_ratios_ttm', 'cash_flow',
+        'product_revenue_segments', 'geo_revenue_segments', 'earnings_history',
+    ],
+    'valuation': ['key_metrics', 'key_metrics_ttm', 'financial_ratios', 'financial_ratios_ttm'],
+    'financial_health': ['financial_ratios', 'financial_ratios_ttm', 'key_metrics', 'key_metrics_ttm', 'employee_count'],
+}
+
+
+def load_page_data(datasets, symbol, period):
+    # Fetch every dataset in one parallel burst; overlap with other pages and
+    # sessions is absorbed by the shared response cache
+    names = list(dict.fromkeys(datasets))
+    calls = []
+    for name in names:
+        fetcher, uses_period = DATASETS[name]
+        calls.append((fetcher, symbol, period) if uses_period else (fetcher, symbol))
+    with span('fetch', f'page data {symbol} ({len(calls)} datasets)'):
+        return dict(zip(names, fetch_all(calls)))
+
+
+def compare_metrics(metric_names, symbols, period):
+    # One burst for every (dataset, symbol) the metrics need, then each statement is
+    # parsed once and shared by all metrics that read it: {metric: [series per symbol]}
+    datasets = metric_datasets(metric_names)
+    calls = []
+    for symbol in symbols:
+        for name in datasets:
+            fetcher, uses_period = DATASETS[name]
+            calls.append((fetcher, symbol, period) if uses_period else (fetcher, symbol))
+    with span('fetch', f'comparison data ({len(calls)} datasets)'):
+        results = fetch_all(calls)
+    per_symbol = [
+        extract_metrics(metric_names, dict(zip(datasets, results[i * len(datasets):(i + 1) * len(datasets)])))
+        for i in range(len(symbols))
+    ]
+    return {name: [symbol_metrics[name] for symbol_metrics in per_symbol] for name in metric_names}
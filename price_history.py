@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+import pandas as pd
+from cache import TTLCache
+from run_memo import count_network_call
+from batch import fetch_all
+from yahoo import get_ticker
+from ohlcv_archive import read_archive, write_archive, remove_archive
+from telemetry import payload_size, record_cache, timed_call
+from profiling import profiled
+
+# Periods offered on the stock page, shortest first. A stored history covering one
+# period serves every shorter one by slicing.
+PERIODS = ['1wk', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'max']
+PERIOD_OFFSETS = {
+    '1wk': pd.DateOffset(weeks=1),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+    'max': None,
+}
+# How often the bars after the last stored date are re-requested for a stored symbol
+REFRESH_INTERVAL = int(os.environ.get('STOCKLY_PRICE_REFRESH', 5 * 60))
+# Symbols nobody has looked at for a day drop out of the store
+STORE_TTL = 24 * 60 * 60
+
+# symbol -> {'frame': daily OHLCV bars, oldest first, 'period': longest period covered,
+#            'checked': monotonic time of the last fetch}. Entries are replaced, never mutated,
+# so a frame handed to a caller never changes underneath it.
+_histories = TTLCache(int(os.environ.get('STOCKLY_PRICE_CACHE_SIZE', 64)))
+_symbol_locks = {}
+_symbol_locks_lock = threading.Lock()
+
+
+def _symbol_lock(symbol):
+    with _symbol_locks_lock:
+        return _symbol_locks.setdefault(symbol, threading.Lock())
+
+
+def period_start(period, tz):
+    return pd.Timestamp.now(tz=tz).normalize() - PERIOD_OFFSETS[period]
+
+
+def _download(symbol, **kwargs):
+    count_network_call()
+    with timed_call('yf-history', symbol) as call:
+        bars = get_ticker(symbol).history(**kwargs)
+        call['size'] = payload_size(bars)
+    return bars
+
+
+def _has_corporate_actions(bars):
+    actions = [column for column in ('Dividends', 'Stock Splits') if column in bars]
+    return bool(actions) and bool((bars[actions] != 0).to_numpy().any())
+
+
+def _fetch_full(symbol, period):
+    if PERIOD_OFFSETS[period] is None:
+        frame = _download(symbol, period='max')
+    else:
+        frame = _download(symbol, start=period_start(period, None).strftime('%Y-%m-%d'))
+    return {'frame': frame, 'period': period, 'checked': time.monotonic()}
+
+
+def _extend_back(symbol, entry, period):
+    # Only download the bars older than what is stored
+    frame = entry['frame']
+    if PERIOD_OFFSETS[period] is None:
+        # With an end but no start or period, yfinance returns only the month before the end
+        older = _download(symbol, period='max', end=frame.index[0].strftime('%Y-%m-%d'))
+    else:
+        start = period_start(period, frame.index.tz)
+        if start >= frame.index[0]:
+            return {'frame': frame, 'period': period, 'checked': entry['checked']}
+        older = _download(symbol, start=start.strftime('%Y-%m-%d'), end=frame.index[0].strftime('%Y-%m-%d'))
+    older = older[older.index < frame.index[0]]
+    return {'frame': pd.concat([older, frame]) if len(older) else frame, 'period': period, 'checked': entry['checked']}
+
+
+def _refresh(symbol, entry):
+    # Re-request from the last stored date: that bar may have been partial, later ones are new
+    frame = entry['frame']
+    last = frame.index[-1]
+    newer = _download(symbol, start=last.strftime('%Y-%m-%d'))
+    if newer.empty or (newer.index[-1] == last and newer.iloc[-1:].equals(frame.iloc[-1:])):
+        return {'frame': frame, 'period': entry['period'], 'checked': time.monotonic()}
+    if _has_corporate_actions(newer[newer.index > last]):
+        # A dividend or split re-adjusts every earlier price, so the stored bars are stale
+        return _fetch_full(symbol, entry['period'])
+    frame = pd.concat([frame[frame.index < newer.index[0]], newer])
+    return {'frame': frame, 'period': entry['period'], 'checked': time.monotonic()}
+
+
+def _load_archived(symbol):
+    archived = read_archive(symbol)
+    if archived is None:
+        return None
+    frame, meta = archived
+    age = time.time() - meta['written_at']
+    return {'frame': frame, 'period': 'max', 'checked': time.monotonic() - age}
+
+
+def _archive(symbol, entry):
+    # Full histories live in the memory-mapped archive, shared by every session and process
+    try:
+        frame = write_archive(symbol, entry['frame'])
+    except (OSError, ValueError) as err:
+        print(f"An error occurred: {err}")
+        return entry
+    return {'frame': frame, 'period': entry['period'], 'checked': entry['checked']}
+
+
+def slice_period(frame, period):
+    if frame.empty or PERIOD_OFFSETS[period] is None:
+        return frame
+    return frame.iloc[frame.index.searchsorted(period_start(period, frame.index.tz)):]
+
+
+@profiled('fetch', 'price history')
+def get_price_history(symbol, period='1y'):
+    if period not in PERIOD_OFFSETS:
+        return _download(symbol, period=period)
+
+    with _symbol_lock(symbol):
+        cached = _histories.get(symbol)
+        stored = cached or _load_archived(symbol)
+        entry = stored
+        if entry is None or entry['frame'].empty:
+            entry = _fetch_full(symbol, period)
+        else:
+            if PERIODS.index(entry['period']) < PERIODS.index(period):
+                entry = _extend_back(symbol, entry, period)
+            if time.monotonic() - entry['checked'] > REFRESH_INTERVAL:
+                entry = _refresh(symbol, entry)
+        if entry['period'] == 'max' and not entry['frame'].empty and (stored is None or entry['frame'] is not stored['frame']):
+            entry = _archive(symbol, entry)
+        if not entry['frame'].empty:
+            _histories.set(symbol, entry, STORE_TTL)
+        if entry is stored:
+            record_cache('yf-history', symbol, 'memory' if cached is not None else 'store')
+    return slice_period(entry['frame'], period)
+
+
+def invalidate_prices(symbol=None):
+    _histories.invalidate(None if symbol is None else lambda key: key == symbol)
+    remove_archive(symbol)
+
+
+def get_price_panel(symbols, period='1y', column='Close'):
+    # One column per symbol on a shared calendar-date index. Symbols are fetched in parallel
+    # through get_price_history, so each lands in (or is served from) the shared store and
+    # the whole batch takes about one request's latency.
+    symbols = list(dict.fromkeys(symbols))
+    frames = fetch_all([(get_price_history, symbol, period) for symbol in symbols])
+    columns = {}
+    for symbol, frame in zip(symbols, frames):
+        if frame.empty or column not in frame:
+            continue
+        # Exchanges differ in time zone, so align on the trading date rather than the timestamp
+        dates = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+        columns[symbol] = pd.Series(frame[column].to_numpy(), index=dates.normalize())
+    panel = pd.DataFrame(columns)
+    return panel.reindex(columns=[symbol for symbol in symbols if symbol in columns])
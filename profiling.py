@@ -0,0 +1,211 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+# Opt-in per-rerun profile of where a page spends its time. app.py starts one when
+# STOCKLY_PROFILE is set or the URL has ?profile, the fetch, compute and render code
+# marks its spans, and the result is drawn as a waterfall under the page and written as
+# a Chrome trace (open in Perfetto, chrome://tracing or speedscope for a flamegraph).
+PROFILE_DIR = os.environ.get('STOCKLY_PROFILE_DIR', os.path.join(
+    os.environ.get('STOCKLY_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')), 'profiles'))
+# Waterfall rows beyond this are left to the trace file
+MAX_ROWS = 300
+# fetch: waiting on cached_fetch misses and page data bursts; extract: statement parsing and
+# metric extraction; figure: building Plotly figures; render: st.plotly_chart, st.dataframe and
+# st.table, which serialize the figure or frame. Sections group the spans of one lazily built block.
+PHASES = ('fetch', 'extract', 'figure', 'render')
+PHASE_COLORS = {'fetch': 'rgb(158,202,225)', 'extract': 'rgb(255,215,0)', 'figure': 'rgb(255,127,80)',
+                'render': 'rgb(34,139,34)', 'section': 'rgb(200,200,200)', 'page': 'rgb(120,120,120)'}
+
+_profile = contextvars.ContextVar('stockly_profile', default=None)
+
+
+class Profile:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.finished = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, phase, label, started, finished):
+        thread = threading.current_thread()
+        with self._lock:
+            self.spans.append({'phase': phase, 'label': label, 'start': started - self.started,
+                               'end': finished - self.started, 'thread': thread.name, 'tid': thread.ident})
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+
+@contextlib.contextmanager
+def span(phase, label):
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(phase, label, started, time.perf_counter())
+
+
+def profiled(phase, label=None):
+    # Decorator form of span(); the label defaults to the function name
+    def decorate(function):
+        name = label or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profile.get() is None:
+                return function(*args, **kwargs)
+            with span(phase, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profiling_requested():
+    return bool(os.environ.get('STOCKLY_PROFILE')) or 'profile' in st.query_params
+
+
+def _timed_element(method, describe):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if _profile.get() is None:
+            return method(self, *args, **kwargs)
+        with span('render', describe(args[0] if args else next(iter(kwargs.values()), None))):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _figure_title(figure):
+    title = getattr(getattr(getattr(figure, 'layout', None), 'title', None), 'text', None)
+    return f'plotly_chart {title}' if title else 'plotly_chart'
+
+
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def install_render_hooks():
+    # Times the elements that serialize large payloads. Patched once per process; the
+    # wrappers fall straight through when no profile is running.
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        DeltaGenerator.plotly_chart = _timed_element(DeltaGenerator.plotly_chart, _figure_title)
+        for name in ('dataframe', 'table'):
+            setattr(DeltaGenerator, name, _timed_element(getattr(DeltaGenerator, name), lambda data, name=name: f'{name} {getattr(data, "shape", "")}'))
+        for name in ('plotly_chart', 'dataframe', 'table'):
+            setattr(st, name, getattr(DeltaGenerator, name).__get__(getattr(st, name).__self__))
+        _hooks_installed = True
+
+
+def start_profile(page):
+    install_render_hooks()
+    profile = Profile(page)
+    profile.token = _profile.set(profile)
+    return profile
+
+
+def finish_profile(profile):
+    profile.finished = time.perf_counter()
+    profile.add('page', profile.page, profile.started, profile.finished)
+    _profile.reset(profile.token)
+    return profile
+
+
+def _merged_seconds(intervals):
+    # Wall time covered by possibly overlapping intervals (threads fetch in parallel)
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def phase_summary(profile):
+    rows = []
+    for phase in PHASES:
+        spans = [item for item in profile.spans if item['phase'] == phase]
+        covered = _merged_seconds([(item['start'], item['end']) for item in spans])
+        rows.append({'phase': phase, 'spans': len(spans), 'wall_ms': round(covered * 1000, 1),
+                     'share': f'{covered / profile.seconds:.0%}' if profile.seconds else ''})
+    return rows
+
+
+def waterfall(profile):
+    spans = sorted(profile.spans, key=lambda item: (item['start'], -item['end']))[:MAX_ROWS]
+    rows = [f"{i:03d} {item['label']}" for i, item in enumerate(spans)]
+    fig = go.Figure()
+    for phase in ('page', 'section') + PHASES:
+        selected = [(row, item) for row, item in zip(rows, spans) if item['phase'] == phase]
+        if not selected:
+            continue
+        fig.add_trace(go.Bar(
+            name=phase,
+            orientation='h',
+            y=[row for row, _ in selected],
+            base=[item['start'] * 1000 for _, item in selected],
+            x=[(item['end'] - item['start']) * 1000 for _, item in selected],
+            customdata=[item['thread'] for _, item in selected],
+            hovertemplate='%{y}<br>%{base:.1f} ms + %{x:.1f} ms<br>thread %{customdata}<extra></extra>',
+            marker_color=PHASE_COLORS[phase]
+        ))
+    fig.update_layout(
+        title=f'{profile.page} rerun, {profile.seconds * 1000:.0f} ms',
+        xaxis_title='Milliseconds since the rerun started',
+        yaxis=dict(categoryorder='array', categoryarray=rows[::-1], showticklabels=len(rows) <= 80),
+        barmode='overlay',
+        height=max(300, 18 * len(rows) + 120)
+    )
+    return fig
+
+
+def trace_events(profile):
+    # Chrome trace event format: complete events in microseconds, one track per thread
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': f'stockly {profile.page}'}}]
+    for item in profile.spans:
+        events.append({'name': item['label'], 'cat': item['phase'], 'ph': 'X', 'pid': 1, 'tid': item['tid'],
+                       'ts': item['start'] * 1e6, 'dur': (item['end'] - item['start']) * 1e6, 'args': {'thread': item['thread']}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms',
+            'otherData': {'page': profile.page, 'started_at': profile.started_at, 'seconds': profile.seconds}}
+
+
+def dump_profile(profile):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r'[^a-z0-9]+', '-', profile.page.lower()).strip('-')
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(profile.started_at))}-{slug}.json")
+    with open(path, 'w') as file:
+        json.dump(trace_events(profile), file)
+    return path
+
+
+def show_profile(profile):
+    st.divider()
+    st.subheader('Profile')
+    st.dataframe(phase_summary(profile), hide_index=True)
+    st.plotly_chart(waterfall(profile))
+    try:
+        st.caption(f'Trace written to {dump_profile(profile)}')
+    except OSError as err:
+        print(f"An error occurred: {err}")
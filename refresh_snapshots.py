@@ -0,0 +1,126 @@
+import argparse
+import os
+import threading
+import time
+from store import flush_usage, refreshing_ahead, read_snapshot, write_snapshot
+from run_memo import begin_run
+from figure_cache import fingerprint
+from page_data import PAGE_PLANS, load_page_data
+from metrics import METRICS, extract_metrics, plot_metric
+from functions import plot_revenue_net_income_operating_income, plot_revenue_segments, plot_revenue_geo_segments, \
+    plot_revenue_net_income_changes, plot_profit_margins, plot_stacked_area_margins, plot_fcf_net_income, \
+    plot_past_year_earnings, plot_earnings, plot_current_quick_ratio, plot_employee_count
+
+# Keeps the dashboards of a watchlist warm: every payload the fundamentals pages read is
+# revalidated into the persistent store before it expires, so page loads for these symbols
+# are reads from SQLite, and every metric series and figure is rebuilt when the data changed.
+# Built figures live in the process's figure cache; run inside the app (STOCKLY_REFRESH_IN_APP)
+# the pages reuse them, run standalone the build only checks and times them.
+#
+#   python refresh_snapshots.py                 # one pass over STOCKLY_WATCHLIST (cron)
+#   python refresh_snapshots.py --loop 600 NVDA  # keep refreshing NVDA every 10 minutes
+WATCHLIST = [symbol.strip() for symbol in os.environ.get('STOCKLY_WATCHLIST', 'AAPL,MSFT,GOOGL,AMZN').split(',') if symbol.strip()]
+# Expected time between two passes; payloads that would expire before the next pass are refetched now
+REFRESH_INTERVAL = int(os.environ.get('STOCKLY_REFRESH_INTERVAL', 10 * 60))
+PERIODS = ['annual', 'quarter']
+DATASETS = list(dict.fromkeys(name for page in ('profitability', 'valuation', 'financial_health') for name in PAGE_PLANS[page]))
+
+
+def build_dashboard(symbol, data):
+    # The same series and figures profitability.py, valuation.py and financial_health.py draw
+    metric_series = extract_metrics(list(METRICS), data)
+    figures = [plot_metric(name, symbol, series) for name, series in metric_series.items()]
+    figures += [
+        plot_revenue_net_income_operating_income(symbol, data['income_statement'], data['income_statement_growth']),
+        plot_revenue_segments(symbol, data['product_revenue_segments']),
+        plot_revenue_geo_segments(symbol, data['geo_revenue_segments']),
+        plot_revenue_net_income_changes(symbol, metric_series['revenue'], metric_series['net_income']),
+        plot_profit_margins(symbol, metric_series['gross_profit_margin'], metric_series['net_income_margin'], metric_series['operating_profit_margin']),
+        plot_stacked_area_margins(symbol, metric_series['gross_profit_margin'], metric_series['operating_profit_margin'], metric_series['net_income_margin']),
+        plot_fcf_net_income(symbol, metric_series['free_cash_flow'], metric_series['net_income']),
+        plot_past_year_earnings(symbol, data['earnings_history']),
+        plot_earnings(symbol, data['earnings_history']),
+        plot_current_quick_ratio(symbol, metric_series['current_ratio'], metric_series['quick_ratio']),
+        plot_employee_count(symbol, data['employee_count']),
+    ]
+    return metric_series, figures
+
+
+def refresh_symbol(symbol, period, force=False):
+    started = time.perf_counter()
+    run = begin_run()
+    with refreshing_ahead(REFRESH_INTERVAL):
+        data = load_page_data(DATASETS, symbol, period)
+    source = fingerprint([data[name] for name in DATASETS])
+    snapshot = read_snapshot(symbol, period)
+    if not force and snapshot is not None and snapshot['fingerprint'] == source:
+        return {'symbol': symbol, 'period': period, 'status': 'unchanged', 'requests': run.network_calls, 'seconds': time.perf_counter() - started}
+
+    build_started = time.perf_counter()
+    metric_series, figures = build_dashboard(symbol, data)
+    build_seconds = time.perf_counter() - build_started
+    write_snapshot(symbol, period, source, build_seconds)
+    return {
+        'symbol': symbol, 'period': period, 'status': 'built', 'requests': run.network_calls,
+        'series': len(metric_series), 'figures': len(figures), 'build_seconds': build_seconds,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def refresh_watchlist(symbols, force=False):
+    reports = []
+    for symbol in symbols:
+        for period in PERIODS:
+            try:
+                report = refresh_symbol(symbol, period, force)
+            except Exception as err:
+                print(f"An error occurred: {err}")
+                report = {'symbol': symbol, 'period': period, 'status': 'failed', 'seconds': 0.0}
+            reports.append(report)
+            print(format_report(report), flush=True)
+    flush_usage()
+    return reports
+
+
+def refresh_forever(symbols, interval, force=False):
+    while True:
+        refresh_watchlist(symbols, force)
+        force = False
+        time.sleep(interval)
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def start_background_refresh(symbols=None, interval=REFRESH_INTERVAL):
+    # Once per process. The first pass rebuilds everything, since a snapshot recorded by
+    # another process says nothing about this process's figure cache.
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = threading.Thread(target=refresh_forever, args=(symbols or WATCHLIST, interval, True), daemon=True, name='stockly-snapshots')
+            _background.start()
+
+
+def format_report(report):
+    line = f"{report['symbol']:<8} {report['period']:<8} {report['status']:<10} {report['seconds']:7.2f}s"
+    if 'requests' in report:
+        line += f"  {report['requests']} requests"
+    if report['status'] == 'built':
+        line += f", {report['series']} series and {report['figures']} figures in {report['build_seconds']:.2f}s"
+    return line
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute dashboard snapshots for a watchlist of symbols.')
+    parser.add_argument('symbols', nargs='*', help='symbols to refresh (default: STOCKLY_WATCHLIST)')
+    parser.add_argument('--loop', type=int, metavar='SECONDS', help='keep refreshing, one pass every SECONDS')
+    parser.add_argument('--force', action='store_true', help='rebuild even when the source data is unchanged')
+    args = parser.parse_args()
+    symbols = args.symbols or WATCHLIST
+    if args.loop:
+        REFRESH_INTERVAL = args.loop
+        refresh_forever(symbols, args.loop, args.force)
+    else:
+        refresh_watchlist(symbols, args.force)
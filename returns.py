@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from price_history import PERIODS, PERIOD_OFFSETS, period_start
+
+TRADING_DAYS = 252
+# A history that starts this long after a period's start does not cover that period
+COVERAGE_SLACK = pd.Timedelta(days=7)
+# Annualizing a few weeks of return is meaningless, so CAGR starts at (about) one year
+MIN_CAGR_YEARS = 0.95
+
+
+def period_return(closes):
+    closes = np.asarray(closes, dtype=float)
+    if len(closes) == 0:
+        return np.nan
+    return closes[-1] / closes[0] - 1
+
+
+def period_starts(index, periods=PERIODS):
+    # Position of the first bar of every period; -1 where the history starts too late, or
+    # ends before the period starts (a delisted or halted symbol)
+    starts = np.empty(len(periods), dtype=np.int64)
+    for i, period in enumerate(periods):
+        if PERIOD_OFFSETS[period] is None:
+            starts[i] = 0
+            continue
+        start = period_start(period, index.tz)
+        starts[i] = index.searchsorted(start) if index[0] <= start + COVERAGE_SLACK else -1
+    starts[starts >= len(index)] = -1
+    return starts
+
+
+def return_statistics(stock_prices, periods=PERIODS):
+    # Return, CAGR, annualized volatility and max drawdown for every period at once, from
+    # one price history that covers the longest of them. Rows are periods.
+    closes = stock_prices['Close'].to_numpy(dtype=float)
+    index = stock_prices.index
+    statistics = pd.DataFrame(np.nan, index=list(periods), columns=['Return', 'CAGR', 'Volatility', 'Max Drawdown'])
+    if len(closes) < 2:
+        return statistics
+
+    starts = period_starts(index, periods)
+    covered = starts >= 0
+    starts = np.where(covered, starts, 0)
+
+    total_return = closes[-1] / closes[starts] - 1
+    years = (index[-1] - index[starts]).days.to_numpy() / 365.25
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where(years >= MIN_CAGR_YEARS, (1 + total_return) ** (1 / years) - 1, np.nan)
+
+    # Windowed mean/variance of daily returns from prefix sums, so every window is O(1).
+    # Missing bars contribute nothing instead of poisoning every window after them.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_returns = closes[1:] / closes[:-1] - 1
+    finite = np.isfinite(daily_returns)
+    daily_returns = np.where(finite, daily_returns, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(daily_returns)))
+    squares = np.concatenate(([0.0], np.cumsum(daily_returns ** 2)))
+    observed = np.concatenate(([0], np.cumsum(finite)))
+    counts = observed[-1] - observed[starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = (sums[-1] - sums[starts]) / counts
+        variances = ((squares[-1] - squares[starts]) - counts * means ** 2) / (counts - 1)
+    volatility = np.sqrt(np.clip(variances, 0, None)) * np.sqrt(TRADING_DAYS)
+
+    # A drawdown depends on the running peak since the window start, so it takes one
+    # accumulate per period (a few thousand bars at most)
+    drawdowns = np.array([np.nanmin(closes[start:] / np.fmax.accumulate(closes[start:]) - 1) for start in starts])
+
+    statistics['Return'] = np.where(covered, total_return, np.nan)
+    statistics['CAGR'] = np.where(covered, cagr, np.nan)
+    statistics['Volatility'] = np.where(covered & (counts > 1), volatility, np.nan)
+    statistics['Max Drawdown'] = np.where(covered, drawdowns, np.nan)
+    return statistics
+
+
+def rolling_returns(stock_prices, periods=PERIODS):
+    # Trailing return over each period length ending at every bar, one column per period
+    closes = stock_prices['Close'].to_numpy(dtype=float)
+    index = stock_prices.index
+    rolling = {}
+    for period in periods:
+        offset = PERIOD_OFFSETS[period]
+        if offset is None:
+            rolling[period] = closes / closes[0] - 1 if len(closes) else closes
+            continue
+        lookback = index - offset
+        positions = index.searchsorted(lookback)
+        values = closes / closes[np.minimum(positions, len(closes) - 1)] - 1
+        rolling[period] = np.where(lookback >= index[0], values, np.nan)
+    return pd.DataFrame(rolling, index=index)
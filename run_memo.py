@@ -0,0 +1,40 @@
+import contextvars
+import threading
+
+# Per script-run memo: app.py starts a fresh one on every Streamlit rerun, so each
+# (endpoint, symbol, period) is fetched at most once per rerun regardless of cache TTLs
+
+
+class RunMemo:
+    def __init__(self):
+        self.results = {}
+        self.network_calls = 0
+        self.cache_hits = 0
+        self.lock = threading.Lock()
+
+    def count_network_call(self):
+        with self.lock:
+            self.network_calls += 1
+
+    def count_cache_hit(self):
+        with self.lock:
+            self.cache_hits += 1
+
+
+_current_run = contextvars.ContextVar('stockly_run', default=None)
+
+
+def begin_run():
+    memo = RunMemo()
+    _current_run.set(memo)
+    return memo
+
+
+def current_run():
+    return _current_run.get()
+
+
+def count_network_call():
+    memo = _current_run.get()
+    if memo is not None:
+        memo.count_network_call()
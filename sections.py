@@ -0,0 +1,91 @@
+import functools
+import os
+import time
+import streamlit as st
+from streamlit.runtime.scriptrunner_utils.exceptions import RerunException, StopException
+from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+from cache import TTLCache
+from profiling import span
+from run_memo import begin_run
+from store import flush_usage
+from telemetry import record_run
+
+# Built section contents (figures, tables) per session. Entries expire with the shortest
+# FMP cache lifetime, so a section never shows data older than a fresh fetch would.
+SECTION_CACHE_SIZE = int(os.environ.get('STOCKLY_SECTION_CACHE_SIZE', 64))
+SECTION_TTL = 15 * 60
+
+
+def lazy_expander(parent, label, expanded=False, key=None):
+    # An expander that reruns the page when toggled, so its .open tells whether to build it
+    return parent.expander(label, expanded=expanded, key=key or f'expander_{label}', on_change='rerun')
+
+
+def lazy_tabs(parent, labels, key):
+    # Only the selected tab's .open is True; the others are not built at all
+    return parent.tabs(labels, key=key, on_change='rerun')
+
+
+def tracked_fragment(page):
+    # st.fragment for page blocks. A fragment rerun skips app.py, so it begins its own run memo
+    # and records and flushes its own telemetry; in a full rerun app.py does that for the page.
+    def decorate(block):
+        @functools.wraps(block)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if ctx is None or not ctx.fragment_ids_this_run:
+                return block(*args, **kwargs)
+            run = begin_run()
+            started = time.perf_counter()
+            status = 'ok'
+            try:
+                return block(*args, **kwargs)
+            except RerunException:
+                status = 'rerun'
+                raise
+            except StopException:
+                status = 'stopped'
+                raise
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                record_run(f'{page}: {block.__name__}', time.perf_counter() - started, run, status)
+                flush_usage()
+        return st.fragment(wrapper)
+    return decorate
+
+
+def section_cache():
+    if '_section_cache' not in st.session_state:
+        st.session_state['_section_cache'] = TTLCache(SECTION_CACHE_SIZE)
+    return st.session_state['_section_cache']
+
+
+def build_section(key, build, *args):
+    # key must identify everything the result depends on, e.g. (chart, symbol, period)
+    cache = section_cache()
+    value = cache.get(key)
+    if value is None:
+        with span('section', ' '.join(str(part) for part in key) if isinstance(key, tuple) else str(key)):
+            value = build(*args)
+        cache.set(key, value, SECTION_TTL)
+    return value
+
+
+def lazy_chart(section, key, build, *args):
+    # Fetches and builds the figure only while the section is open, once per key
+    if section.open:
+        section.plotly_chart(build_section(key, build, *args))
+
+
+def kept_text_input(parent, label, value, key):
+    # Streamlit forgets the state of widgets that were not rendered in a run, which is what
+    # happens inside a closed section; keep what the user entered under a separate key
+    kept_key = f'{key}_kept'
+    entered = parent.text_input(label, value=st.session_state.get(kept_key, value), key=key)
+    if entered != value:
+        st.session_state[kept_key] = entered
+    else:
+        st.session_state.pop(kept_key, None)
+    return entered
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from cache import response_cache
+
+# FMP statements are parsed once into columns and reused by every extractor. The parse
+# lives in the response cache entry of its payload, so it expires and is evicted with it.
+
+
+class MetricSeries:
+    # A single metric as parallel date/value arrays, newest first like the FMP payloads.
+    # Indexing and iterating still yield {'date': ..., name: ...} dicts for older callers.
+    __slots__ = ('name', 'dates', 'values')
+
+    def __init__(self, name, dates, values):
+        self.name = name
+        self.dates = dates
+        self.values = values
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MetricSeries(self.name, self.dates[index], self.values[index])
+        return {'date': self.dates[index], self.name: self.values[index]}
+
+    def __iter__(self):
+        for i in range(len(self.dates)):
+            yield self[i]
+
+    def after(self, year):
+        # Same rule as entry['date'][:4] > year, so the 'TTM' row is always kept
+        mask = self.dates.astype('U4') > year
+        if mask.all():
+            return self
+        return MetricSeries(self.name, self.dates[mask], self.values[mask])
+
+    def years(self):
+        return self.dates.astype('U4')
+
+    def with_ttm(self, value):
+        return MetricSeries(
+            self.name,
+            np.concatenate((np.array(['TTM']), self.dates)),
+            np.concatenate((np.array([value], dtype=float), self.values.astype(float, copy=False)))
+        )
+
+
+class Statement:
+    def __init__(self, payload):
+        if isinstance(payload, list) and payload:
+            self.frame = pd.DataFrame.from_records(payload)
+        else:
+            self.frame = pd.DataFrame()
+        if 'date' in self.frame:
+            self.frame.index = self.frame['date'].to_numpy(dtype=str)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def dates(self):
+        return self.column('date')
+
+    def column(self, field):
+        values = self._columns.get(field)
+        if values is None:
+            if field == 'date':
+                values = self.frame.index.to_numpy(dtype=str) if len(self.frame) else np.array([], dtype=str)
+            elif field in self.frame:
+                values = pd.to_numeric(self.frame[field], errors='coerce').to_numpy()
+            else:
+                values = np.full(len(self.frame), np.nan)
+            self._columns[field] = values
+        return values
+
+    def series(self, field, name):
+        return MetricSeries(name, self.dates, self.column(field))
+
+
+def parse_statement(payload):
+    if isinstance(payload, Statement):
+        return payload
+    return response_cache.derived(payload, 'statement', Statement)
@@ -2,6 +2,8 @@ import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 from functions import stock_price_history, stock_price_history_line, calculate_stock_price_change, create_basic_stock_stats, search_company
+from downsample import CHART_POINTS
+from returns import return_statistics
 
 pd.options.display.float_format = '{:.2f}'.format
 st.title('Stockly')
@@ -26,7 +28,8 @@ except TypeError as e:
 
 if stats:
 
-    selected_period = '1y'
+    # The last clicked period survives reruns triggered by other widgets (defaults to 1 year)
+    selected_period = st.session_state.get('price_period', '1y')
     button_clicked = False
     one_week, one_month, three_month, six_month, one_year, two_year, five_year, ten_year, max = stock_price_container.columns(9)
 
@@ -60,12 +63,13 @@ if stats:
 
     # Load the graph based on the selected period or default
     if button_clicked:
-        stock_data = stock_price_history(symbol, selected_period)
-    else:
-        # Default to 1-year graph if no button is clicked
-        stock_data = stock_price_history(symbol, '1y')
+        st.session_state['price_period'] = selected_period
+    # The full history is fetched once; every period button is a local slice of it
+    full_stock_data = stock_price_history(symbol, 'max')
+    stock_data = stock_price_history(symbol, selected_period)
 
-    stock_price_line = stock_price_history_line(symbol, stock_data)
+    show_all_points = stock_price_container.toggle('Show every data point', value=False, help='Long periods are drawn from a downsampled series; turn this on to inspect individual daily bars when zooming in.')
+    stock_price_line = stock_price_history_line(symbol, stock_data, None if show_all_points else CHART_POINTS)
     stock_price_container.plotly_chart(stock_price_line)
     stock_price_change = calculate_stock_price_change(stock_data)
     if stock_price_change < 0:
@@ -73,6 +77,14 @@ if stats:
     else:
         stock_price_container.markdown(f"Change: <span style='color:green'>**+{stock_price_change}%**</span>", unsafe_allow_html=True)
 
+    return_statistics_expander = stock_price_container.expander('Returns by Period', expanded=False)
+    return_statistics_df = return_statistics(full_stock_data) * 100
+    return_statistics_df.index = ['1W', '1M', '3M', '6M', '1Y', '2Y', '5Y', '10Y', 'MAX']
+    return_statistics_expander.dataframe(
+        return_statistics_df,
+        column_config={column: st.column_config.NumberColumn(column, format='%.2f%%') for column in return_statistics_df.columns}
+    )
+
     # Basic Stock Statistics
 
     basic_stock_stats_container = st.container()
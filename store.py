@@ -0,0 +1,210 @@
+import atexit
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from cache import ENDPOINT_TTLS, DEFAULT_TTL, bypassing_memory, cached_fetch, count_result_bytes, expire_in, is_cacheable
+from telemetry import count_usage, pending_usage, record_cache, take_usage, usage_day
+
+# On-disk copy of FMP responses so every worker process and every restart starts warm.
+# SQLite in WAL mode lets any number of processes read while one of them writes.
+DATA_DIR = os.environ.get('STOCKLY_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+DB_PATH = os.path.join(DATA_DIR, 'stockly.db')
+# Seconds a stale copy served because the refetch failed stays in memory before the next attempt
+RETRY_TTL = int(os.environ.get('STOCKLY_RETRY_TTL', 60))
+
+_local = threading.local()
+# Seconds before expiry at which a stored payload already counts as stale; the snapshot
+# refresher raises it so pages never find an expired payload between two of its runs
+_refresh_ahead = contextvars.ContextVar('stockly_refresh_ahead', default=0)
+
+
+def get_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        connection = sqlite3.connect(DB_PATH, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                endpoint TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                period TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, symbol, period)
+            )
+        ''')
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                symbol TEXT NOT NULL,
+                period TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                built_at REAL NOT NULL,
+                build_seconds REAL NOT NULL,
+                PRIMARY KEY (symbol, period)
+            )
+        ''')
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT NOT NULL,
+                source TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                PRIMARY KEY (day, source)
+            )
+        ''')
+        connection.commit()
+        _local.connection = connection
+    return connection
+
+
+def read_fundamentals(endpoint, symbol, period):
+    row = get_connection().execute(
+        'SELECT payload, checksum, fetched_at, checked_at FROM fundamentals WHERE endpoint = ? AND symbol = ? AND period = ?',
+        (endpoint, symbol or '', period or '')
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        'payload': json.loads(row[0]),
+        'checksum': row[1],
+        'fetched_at': row[2],
+        'checked_at': row[3],
+        'size': len(row[0]),
+    }
+
+
+def write_fundamentals(endpoint, symbol, period, payload, previous=None):
+    text = json.dumps(payload, separators=(',', ':'))
+    checksum = hashlib.sha1(text.encode()).hexdigest()
+    now = time.time()
+    connection = get_connection()
+    with connection:
+        if previous is not None and previous['checksum'] == checksum:
+            # Revalidated and unchanged: only refresh the timestamp
+            connection.execute(
+                'UPDATE fundamentals SET checked_at = ? WHERE endpoint = ? AND symbol = ? AND period = ?',
+                (now, endpoint, symbol or '', period or '')
+            )
+        else:
+            connection.execute(
+                'INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (endpoint, symbol or '', period or '', text, checksum, now, now)
+            )
+    return checksum
+
+
+def _read_through(endpoint, symbol, period, fetch):
+    max_age = ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL)
+    try:
+        stored = read_fundamentals(endpoint, symbol, period)
+    except sqlite3.Error as err:
+        print(f"An error occurred: {err}")
+        return fetch()
+
+    age = time.time() - stored['checked_at'] if stored is not None else None
+    if stored is not None and age < max_age - _refresh_ahead.get():
+        record_cache(endpoint, symbol, 'store')
+        # Only for what is left of its lifetime, so memory never outlives the stored copy
+        expire_in(max_age - age)
+        count_result_bytes(stored['size'])
+        return stored['payload']
+
+    try:
+        data = fetch()
+    except Exception as err:
+        if stored is None:
+            raise
+        print(f"An error occurred: {err}")
+        expire_in(RETRY_TTL)
+        count_result_bytes(stored['size'])
+        return stored['payload']
+
+    if not is_cacheable(data):
+        # Keep serving the last good copy through FMP errors and quota limits
+        if stored is None:
+            return data
+        expire_in(RETRY_TTL)
+        count_result_bytes(stored['size'])
+        return stored['payload']
+
+    try:
+        write_fundamentals(endpoint, symbol, period, data, stored)
+    except sqlite3.Error as err:
+        print(f"An error occurred: {err}")
+    return data
+
+
+def stored_fetch(endpoint, symbol, period, fetch):
+    return cached_fetch(endpoint, symbol, period, lambda: _read_through(endpoint, symbol, period, fetch))
+
+
+@contextlib.contextmanager
+def refreshing_ahead(seconds):
+    # Goes past this process's memory copies to the store, and writes what it revalidated
+    # back over them, so pages keep being served from memory meanwhile
+    token = _refresh_ahead.set(seconds)
+    try:
+        with bypassing_memory():
+            yield
+    finally:
+        _refresh_ahead.reset(token)
+
+
+def read_snapshot(symbol, period):
+    row = get_connection().execute(
+        'SELECT fingerprint, built_at, build_seconds FROM snapshots WHERE symbol = ? AND period = ?',
+        (symbol, period)
+    ).fetchone()
+    if row is None:
+        return None
+    return {'fingerprint': row[0], 'built_at': row[1], 'build_seconds': row[2]}
+
+
+def write_snapshot(symbol, period, fingerprint, build_seconds):
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            'INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)',
+            (symbol, period, fingerprint, time.time(), build_seconds)
+        )
+
+
+def add_usage(usage):
+    # Outbound calls per day and provider, summed over every process sharing the store
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            'INSERT INTO usage VALUES (?, ?, ?) ON CONFLICT (day, source) DO UPDATE SET calls = calls + excluded.calls',
+            [(day, source, calls) for (day, source), calls in usage.items()]
+        )
+
+
+def flush_usage():
+    # http_get counts calls in memory; the app flushes them after every rerun, the snapshot
+    # refresher after every pass, and every process once more on exit
+    usage = take_usage()
+    if not usage:
+        return
+    try:
+        add_usage(usage)
+    except sqlite3.Error as err:
+        print(f"An error occurred: {err}")
+        for (day, source), calls in usage.items():
+            count_usage(source, calls, day)
+
+
+atexit.register(flush_usage)
+
+
+def read_usage(source, day=None):
+    # Includes this process's calls that are not flushed yet
+    row = get_connection().execute('SELECT calls FROM usage WHERE day = ? AND source = ?', (day or usage_day(), source)).fetchone()
+    return (row[0] if row else 0) + pending_usage(source, day)
@@ -0,0 +1,146 @@
+import re
+import threading
+import time
+import numpy as np
+from cache import ENDPOINT_TTLS
+
+# Rebuild the index from a fresh listing as often as the listing itself expires; searches
+# keep using the old index meanwhile. A listing that failed to load is retried sooner.
+REFRESH_INTERVAL = ENDPOINT_TTLS['stock-list']
+RETRY_INTERVAL = 5 * 60
+MIN_NAME_SCORE = 0.5
+COMMON_GRAM_SHARE = 0.05
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name):
+    return _NON_ALNUM.sub(' ', (name or '').lower()).strip()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    # Symbol prefixes come from a trie whose nodes keep their best few entries, so a lookup
+    # is one dict step per typed character. Company names are matched fuzzily through a
+    # trigram inverted index scored by Jaccard similarity.
+    def __init__(self, entries, per_node=10):
+        self.entries = [entry for entry in entries if entry.get('symbol')]
+        self.symbols = [entry['symbol'] for entry in self.entries]
+        self._by_symbol = {symbol.upper(): i for i, symbol in enumerate(self.symbols)}
+
+        # Shorter symbols first, so 'A' ranks ahead of 'AA.L' when typing 'A'
+        order = sorted(range(len(self.symbols)), key=lambda i: (len(self.symbols[i]), self.symbols[i]))
+        self._trie = {}
+        for i in order:
+            node = self._trie
+            for char in self.symbols[i].upper():
+                node = node.setdefault(char, {'': []})
+                if len(node['']) < per_node:
+                    node[''].append(i)
+
+        postings = {}
+        self._gram_counts = np.zeros(len(self.entries), dtype=np.int32)
+        for i, entry in enumerate(self.entries):
+            grams = trigrams(normalize_name(entry.get('name')))
+            self._gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def symbol_prefix(self, prefix):
+        node = self._trie
+        for char in prefix.upper():
+            node = node.get(char)
+            if node is None:
+                return []
+        return node['']
+
+    def name_matches(self, query, limit):
+        grams = trigrams(normalize_name(query))
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+        # Grams shared by a large part of the listing ('inc', 'cor') cost the most to count and
+        # say little, so they are skipped while the query is mostly made of rarer ones
+        rare = [ids for ids in lists if len(ids) <= COMMON_GRAM_SHARE * len(self.entries)]
+        counted = len(grams)
+        if 2 * len(rare) >= len(lists):
+            counted -= len(lists) - len(rare)
+            lists = rare
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.entries))
+        candidates = np.flatnonzero(shared)
+        shared = shared[candidates]
+        # How much of the query a name contains ranks first; closer overall length breaks ties
+        coverage = shared / counted
+        similarity = shared / (len(grams) + self._gram_counts[candidates] - shared)
+        keep = coverage >= MIN_NAME_SCORE
+        candidates, coverage, similarity = candidates[keep], coverage[keep], similarity[keep]
+        best = np.lexsort((-similarity, -coverage))[:limit]
+        return candidates[best].tolist()
+
+    def search(self, query, limit=10):
+        query = (query or '').strip()
+        if not query:
+            return []
+        ids = []
+        exact = self._by_symbol.get(query.upper())
+        if exact is not None:
+            ids.append(exact)
+        ids.extend(self.symbol_prefix(query))
+        if len(query) >= 3:
+            ids.extend(self.name_matches(query, limit))
+        return [self.entries[i] for i in dict.fromkeys(ids)][:limit]
+
+
+_index = None
+_built_at = 0.0
+_rebuilding = False
+_lock = threading.Lock()
+
+
+def _build(load_entries):
+    # A failed or error-shaped listing gives an empty index that is retried soon, rather than
+    # a rebuild attempt (and network call) on every keystroke
+    try:
+        entries = load_entries()
+    except Exception as err:
+        print(f"An error occurred: {err}")
+        entries = None
+    if not isinstance(entries, list) or not entries:
+        return SymbolIndex([]), time.monotonic() - REFRESH_INTERVAL + RETRY_INTERVAL
+    return SymbolIndex(entries), time.monotonic()
+
+
+def get_symbol_index(load_entries):
+    # load_entries() returns the full listing; it is only called to (re)build the index,
+    # the first time synchronously and afterwards from a background thread
+    global _index, _built_at, _rebuilding
+    with _lock:
+        if _index is None:
+            _index, _built_at = _build(load_entries)
+            return _index
+        index = _index
+        start_refresh = time.monotonic() - _built_at > REFRESH_INTERVAL and not _rebuilding
+        if start_refresh:
+            _rebuilding = True
+    if start_refresh:
+        threading.Thread(target=_rebuild, args=(load_entries,), daemon=True, name='stockly-symbol-index').start()
+    return index
+
+
+def _rebuild(load_entries):
+    global _index, _built_at, _rebuilding
+    index, built_at = _build(load_entries)
+    with _lock:
+        # Keep serving the old listing if the new one could not be loaded
+        if len(index) or not len(_index):
+            _index = index
+        _built_at = built_at
+        _rebuilding = False
@@ -0,0 +1,237 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from run_memo import current_run
+
+# In-process record of every outbound call (FMP and Yahoo) and of which cache layer served
+# each request, for the admin page and structured logs. Aggregates cover this process only;
+# the FMP calls counted against the daily quota are shared through the store.
+LATENCY_SAMPLES = int(os.environ.get('STOCKLY_TELEMETRY_SAMPLES', 1000))
+RECENT_CALLS = 200
+RECENT_RUNS = 200
+# Calls per day allowed by the FMP plan; 0 when the plan has no daily limit
+FMP_DAILY_QUOTA = int(os.environ.get('FMP_DAILY_QUOTA', 0))
+# Cache layers in the order a request tries them, see cache.cached_fetch and store._read_through
+CACHE_LAYERS = ('run', 'memory', 'coalesced', 'store')
+
+logger = logging.getLogger('stockly.telemetry')
+
+# (endpoint, symbol) of the fetch running in this context, so http_get can label its call
+_fetch_context = contextvars.ContextVar('stockly_fetch', default=None)
+_lock = threading.Lock()
+_endpoints = {}
+_calls = deque(maxlen=RECENT_CALLS)
+_runs = deque(maxlen=RECENT_RUNS)
+_started = time.time()
+# Outbound calls per (day, source) not yet added to the store's usage table, see store.flush_usage
+_usage = {}
+
+
+def _endpoint(endpoint):
+    stats = _endpoints.get(endpoint)
+    if stats is None:
+        stats = _endpoints[endpoint] = {
+            'calls': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0,
+            'latencies': deque(maxlen=LATENCY_SAMPLES), 'statuses': {},
+            **{layer: 0 for layer in CACHE_LAYERS},
+        }
+    return stats
+
+
+@contextlib.contextmanager
+def fetching(endpoint, symbol):
+    token = _fetch_context.set((endpoint, symbol))
+    try:
+        yield
+    finally:
+        _fetch_context.reset(token)
+
+
+def current_fetch():
+    return _fetch_context.get() or (None, None)
+
+
+def source_of(endpoint):
+    return 'yahoo' if endpoint.startswith('yf-') else 'fmp'
+
+
+def payload_size(data):
+    # Bytes on the wire for HTTP responses; yfinance hides them, so its payloads are sized in memory
+    if hasattr(data, 'memory_usage'):
+        return int(data.memory_usage(deep=True).sum())
+    return len(json.dumps(data, default=str, separators=(',', ':')))
+
+
+def usage_day():
+    # Provider quotas reset at midnight UTC
+    return time.strftime('%Y-%m-%d', time.gmtime())
+
+
+def count_usage(source, calls=1, day=None):
+    key = (day or usage_day(), source)
+    with _lock:
+        _usage[key] = _usage.get(key, 0) + calls
+
+
+def take_usage():
+    global _usage
+    with _lock:
+        usage, _usage = _usage, {}
+    return usage
+
+
+def pending_usage(source, day=None):
+    with _lock:
+        return _usage.get((day or usage_day(), source), 0)
+
+
+def record_cache(endpoint, symbol, layer):
+    with _lock:
+        _endpoint(endpoint)[layer] += 1
+    run = current_run()
+    if run is not None:
+        run.count_cache_hit()
+
+
+def record_call(endpoint, symbol, seconds, size, status):
+    # status is the HTTP status, 'ok' for a yfinance call that returned, or the exception name
+    error = status != 'ok' and not (isinstance(status, int) and status < 400)
+    call = {
+        'at': time.time(), 'source': source_of(endpoint), 'endpoint': endpoint, 'symbol': symbol,
+        'ms': round(seconds * 1000, 1), 'bytes': size, 'status': status,
+    }
+    with _lock:
+        stats = _endpoint(endpoint)
+        stats['calls'] += 1
+        stats['errors'] += error
+        stats['bytes'] += size
+        stats['seconds'] += seconds
+        stats['latencies'].append(seconds)
+        stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+        _calls.append(call)
+    logger.info('%s %s %s %.0f ms', endpoint, symbol, status, seconds * 1000, extra={'json_fields': {'event': 'fetch', **call}})
+
+
+@contextlib.contextmanager
+def timed_call(endpoint, symbol):
+    # For calls without an HTTP response at hand: set call['size'] (and 'status') inside the block
+    call = {'size': 0, 'status': 'ok'}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as err:
+        response = getattr(err, 'response', None)
+        call['status'] = getattr(response, 'status_code', None) or type(err).__name__
+        raise
+    finally:
+        record_call(endpoint, symbol, time.perf_counter() - started, call['size'], call['status'])
+
+
+def record_run(page, seconds, run, status='ok'):
+    # status is 'ok', 'error' (the page raised), or 'rerun'/'stopped' (st.rerun(), st.stop())
+    entry = {'at': time.time(), 'page': page, 'ms': round(seconds * 1000, 1), 'network_calls': run.network_calls,
+             'cache_hits': run.cache_hits, 'status': status}
+    with _lock:
+        _runs.append(entry)
+    logger.log(logging.ERROR if status == 'error' else logging.INFO, '%s rerun %s %.0f ms, %d network calls', page, status, seconds * 1000,
+               run.network_calls, extra={'json_fields': {'event': 'rerun', **entry}})
+
+
+def endpoint_stats():
+    with _lock:
+        snapshot = {endpoint: dict(stats, latencies=list(stats['latencies']), statuses=dict(stats['statuses'])) for endpoint, stats in _endpoints.items()}
+    rows = []
+    for endpoint, stats in sorted(snapshot.items()):
+        hits = sum(stats[layer] for layer in CACHE_LAYERS)
+        p50, p95, p99 = np.percentile(stats['latencies'], [50, 95, 99]) * 1000 if stats['latencies'] else (np.nan,) * 3
+        rows.append({
+            'source': source_of(endpoint), 'endpoint': endpoint, 'calls': stats['calls'], 'errors': stats['errors'],
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'mean_kb': stats['bytes'] / stats['calls'] / 1024 if stats['calls'] else np.nan,
+            **{f'{layer}_hits': stats[layer] for layer in CACHE_LAYERS},
+            'hit_rate': hits / (hits + stats['calls']) if hits + stats['calls'] else np.nan,
+            'statuses': stats['statuses'],
+        })
+    return rows
+
+
+def recent_calls():
+    with _lock:
+        return list(_calls)
+
+
+def recent_runs():
+    with _lock:
+        return list(_runs)
+
+
+def run_stats():
+    # Calls per rerun, per page
+    pages = {}
+    for run in recent_runs():
+        pages.setdefault(run['page'], []).append(run)
+    return [
+        {
+            'page': page, 'reruns': len(runs),
+            'errors': sum(run['status'] == 'error' for run in runs),
+            'interrupted': sum(run['status'] in ('rerun', 'stopped') for run in runs),
+            'mean_network_calls': float(np.mean([run['network_calls'] for run in runs])),
+            'max_network_calls': max(run['network_calls'] for run in runs),
+            'mean_cache_hits': float(np.mean([run['cache_hits'] for run in runs])),
+            'p50_ms': float(np.percentile([run['ms'] for run in runs], 50)),
+            'p95_ms': float(np.percentile([run['ms'] for run in runs], 95)),
+        }
+        for page, runs in sorted(pages.items())
+    ]
+
+
+def started_at():
+    return _started
+
+
+def reset():
+    global _started
+    with _lock:
+        _endpoints.clear()
+        _calls.clear()
+        _runs.clear()
+        _started = time.time()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'severity': record.levelname, 'message': record.getMessage(), 'logger': record.name}
+        entry.update(getattr(record, 'json_fields', {}))
+        return json.dumps(entry, default=str)
+
+
+_logging_configured = False
+
+
+def setup_logging():
+    # STOCKLY_CLOUD_LOGGING sends the records to Google Cloud Logging, where json_fields become
+    # the structured payload; STOCKLY_TELEMETRY_LOG writes them to stderr as JSON lines
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    if os.environ.get('STOCKLY_CLOUD_LOGGING'):
+        try:
+            import google.cloud.logging
+            google.cloud.logging.Client().setup_logging()
+            logger.setLevel(logging.INFO)
+            return
+        except Exception as err:
+            print(f"An error occurred: {err}")
+    if os.environ.get('STOCKLY_TELEMETRY_LOG'):
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep anything a test touches in the store out of the real data directory
+os.environ.setdefault('STOCKLY_DATA_DIR', tempfile.mkdtemp(prefix='stockly-tests-'))
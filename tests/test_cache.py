@@ -0,0 +1,148 @@
+import threading
+import time
+import pytest
+import telemetry
+from cache import TTLCache, bypassing_memory, cached_fetch, count_result_bytes, expire_in, response_cache
+
+FOLLOWERS = 7
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.invalidate()
+    yield
+    response_cache.invalidate()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def coalesced(endpoint):
+    return telemetry._endpoints.get(endpoint, {}).get('coalesced', 0)
+
+
+def run_concurrently(endpoint, fetch):
+    # The leader's fetch blocks until every follower is waiting on it
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cached_fetch(endpoint, 'AAPL', None, fetch))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=call) for _ in range(FOLLOWERS + 1)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_fetches_coalesce():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return [{'symbol': 'AAPL'}]
+
+    threads, results, errors = run_concurrently('test-coalesce', fetch)
+    wait_for(lambda: coalesced('test-coalesce') == FOLLOWERS)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and not errors
+    assert len(results) == FOLLOWERS + 1 and all(result is results[0] for result in results)
+    assert response_cache.get(('test-coalesce', 'AAPL', None)) is results[0]
+
+
+def test_followers_see_the_leaders_error():
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError('upstream down')
+
+    threads, results, errors = run_concurrently('test-coalesce-error', fetch)
+    wait_for(lambda: coalesced('test-coalesce-error') == FOLLOWERS)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert not results and len(errors) == FOLLOWERS + 1
+    assert response_cache.get(('test-coalesce-error', 'AAPL', None)) is None
+
+
+def test_uncacheable_responses_are_not_kept():
+    calls = []
+    for _ in range(2):
+        cached_fetch('test-uncacheable', 'NOPE', None, lambda: calls.append(1) or [])
+    assert len(calls) == 2
+
+
+def test_fetch_sets_ttl_and_size_of_its_entry():
+    def fetch():
+        expire_in(30)
+        count_result_bytes(1234)
+        return [{'symbol': 'AAPL'}]
+
+    cached_fetch('test-ttl', 'AAPL', None, fetch)
+    expires, _, _, size = response_cache._entries[('test-ttl', 'AAPL', None)]
+    assert 25 < expires - time.monotonic() <= 30
+    assert size == 1234 and response_cache.stats()['bytes'] == 1234
+
+
+def test_bypassing_memory_replaces_the_entry():
+    cached_fetch('test-bypass', 'AAPL', None, lambda: ['old'])
+    assert cached_fetch('test-bypass', 'AAPL', None, lambda: ['ignored']) == ['old']
+    with bypassing_memory():
+        assert cached_fetch('test-bypass', 'AAPL', None, lambda: ['new']) == ['new']
+    assert cached_fetch('test-bypass', 'AAPL', None, lambda: ['ignored']) == ['new']
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = TTLCache(None, 100)
+    cache.set('a', ['a'], 60, 40)
+    cache.set('b', ['b'], 60, 40)
+    cache.get('a')
+    cache.set('c', ['c'], 60, 40)
+    assert cache.get('b') is None and cache.get('a') == ['a'] and cache.get('c') == ['c']
+    assert cache.stats()['bytes'] == 80
+    cache.set('a', ['A'], 60, 10)
+    assert cache.stats()['bytes'] == 50
+    # Larger than the whole bound: not kept, and evicts everything older
+    cache.set('huge', ['huge'], 60, 101)
+    assert cache.stats()['size'] == 0 and cache.stats()['bytes'] == 0
+
+
+def test_entry_count_bound():
+    cache = TTLCache(2)
+    for key in 'abc':
+        cache.set(key, [key], 60)
+    assert cache.get('a') is None and cache.stats()['size'] == 2
+
+
+def test_expired_entries_are_dropped():
+    cache = TTLCache()
+    cache.set('a', ['a'], -1, 10)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_derived_values_live_in_their_entry():
+    cache = TTLCache()
+    payload = [{'revenue': 1}]
+    cache.set('a', payload, 60)
+    computed = []
+    compute = lambda value: computed.append(1) or len(value)
+    assert cache.derived(payload, 'length', compute) == 1
+    assert cache.derived(payload, 'length', compute) == 1
+    assert len(computed) == 1
+    # Not cached, or no longer cached: computed every time
+    cache.derived(list(payload), 'length', compute)
+    cache.invalidate()
+    cache.derived(payload, 'length', compute)
+    assert len(computed) == 3
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from downsample import CHART_POINTS, downsample_series, lttb_indices
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 3), (100, 7), (1001, 1000), (5000, CHART_POINTS), (25000, CHART_POINTS)])
+def test_lttb_keeps_endpoints_and_threshold(n, threshold):
+    y = random_walk(n)
+    kept = lttb_indices(np.arange(n), y, threshold)
+    assert len(kept) == threshold
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+@pytest.mark.parametrize('threshold', [0, 2, 100, 150])
+def test_lttb_returns_everything_below_threshold(threshold):
+    kept = lttb_indices(np.arange(100), random_walk(100), threshold)
+    assert np.array_equal(kept, np.arange(100))
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(10000)
+    y[4321] = 50.0
+    assert 4321 in lttb_indices(np.arange(len(y)), y, 100)
+
+
+def test_downsample_series_never_exceeds_chart_points():
+    index = pd.bdate_range('1990-01-01', periods=12000, tz='America/New_York')
+    values = 100 + random_walk(len(index), 1)
+    kept_index, kept_values = downsample_series(index, values)
+    assert len(kept_index) == len(kept_values) <= CHART_POINTS
+    assert kept_index[0] == index[0] and kept_index[-1] == index[-1]
+    assert kept_index.is_monotonic_increasing
+
+
+def test_downsample_series_drops_gaps():
+    index = pd.bdate_range('2000-01-03', periods=5000)
+    values = 100 + random_walk(len(index), 2)
+    values[:10] = np.nan
+    values[2000:2100] = np.nan
+    values[-3:] = np.nan
+    kept_index, kept_values = downsample_series(index, values, 500)
+    assert len(kept_values) == 500
+    assert np.isfinite(kept_values).all()
+    # Endpoints are the first and last bars that have a value
+    assert kept_index[0] == index[10] and kept_index[-1] == index[-4]
+
+
+def test_downsample_series_leaves_short_or_unbounded_series_alone():
+    index = pd.bdate_range('2020-01-01', periods=300)
+    values = random_walk(300, 3)
+    assert downsample_series(index, values)[0] is index
+    assert len(downsample_series(index, values, None)[1]) == 300
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from figure_cache import cached_figure, clear_figures, figure_cache_stats, fingerprint
+from statements import MetricSeries
+
+DATES = np.array(['2024-09-30', '2024-06-30', '2024-03-31'])
+BUILDS = []
+
+
+@cached_figure
+def plot_values(title, values, color='blue'):
+    BUILDS.append(title)
+    return go.Figure(go.Bar(y=list(values), marker_color=color), layout=dict(title=title))
+
+
+@cached_figure
+def plot_other(title, values, color='blue'):
+    BUILDS.append(title)
+    return go.Figure(go.Scatter(y=list(values)))
+
+
+@pytest.fixture(autouse=True)
+def empty_figures():
+    clear_figures()
+    BUILDS.clear()
+    yield
+    clear_figures()
+
+
+def test_equal_data_gives_equal_fingerprints():
+    payload = [{'date': '2024-09-30', 'revenue': 1.0}, {'date': '2024-06-30', 'revenue': 2.0}]
+    copy = [dict(row) for row in payload]
+    assert fingerprint('AAPL', payload) == fingerprint('AAPL', copy)
+    frame = pd.DataFrame({'Close': [1.0, 2.0]}, index=pd.to_datetime(['2024-01-02', '2024-01-03']))
+    assert fingerprint(frame) == fingerprint(frame.copy())
+    series = MetricSeries('revenue', DATES, np.array([1.0, 2.0, 3.0]))
+    assert fingerprint(series) == fingerprint(MetricSeries('revenue', DATES.copy(), np.array([1.0, 2.0, 3.0])))
+
+
+@pytest.mark.parametrize('left, right', [
+    ([{'revenue': 1.0}], [{'revenue': 1.5}]),
+    ([{'revenue': 1.0}], [{'netIncome': 1.0}]),
+    (np.array([1.0, 2.0]), np.array([1, 2])),
+    (np.array([1.0, 2.0]), np.array([[1.0, 2.0]])),
+    (pd.Series([1.0, 2.0], index=[0, 1]), pd.Series([1.0, 2.0], index=[1, 2])),
+    (pd.DataFrame({'a': [1.0]}), pd.DataFrame({'b': [1.0]})),
+    (MetricSeries('revenue', DATES, np.array([1.0, 2.0, 3.0])), MetricSeries('net_income', DATES, np.array([1.0, 2.0, 3.0]))),
+    ([[1], [2, 3]], [[1, 2], [3]]),
+    ('1', 1),
+])
+def test_different_data_gives_different_fingerprints(left, right):
+    assert fingerprint(left) != fingerprint(right)
+
+
+def test_unchanged_data_is_a_hit():
+    first = plot_values('Revenue', [1, 2, 3])
+    stats = figure_cache_stats()
+    assert plot_values('Revenue', [1, 2, 3]) is first
+    assert BUILDS == ['Revenue']
+    assert figure_cache_stats()['hits'] == stats['hits'] + 1
+
+
+def test_changed_data_or_arguments_are_misses():
+    first = plot_values('Revenue', [1, 2, 3])
+    assert plot_values('Revenue', [1, 2, 4]) is not first
+    assert plot_values('Revenue', [1, 2, 3], color='red') is not first
+    assert plot_values('Net Income', [1, 2, 3]) is not first
+    assert len(BUILDS) == 4
+
+
+def test_functions_do_not_share_entries():
+    assert plot_values('Revenue', [1, 2]) is not plot_other('Revenue', [1, 2])
+    assert len(BUILDS) == 2
+
+
+def test_clear_figures_forces_a_rebuild():
+    first = plot_values('Revenue', [1, 2, 3])
+    clear_figures()
+    assert plot_values('Revenue', [1, 2, 3]) is not first
+    assert len(BUILDS) == 2
@@ -0,0 +1,95 @@
+import contextvars
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import http_client
+import telemetry
+from http_client import MAX_RETRIES, MeteredRetry, http_get, session
+from run_memo import begin_run
+
+
+class Flaky:
+    # Answers with the queued statuses in order, then 200
+    def __init__(self):
+        self.statuses = []
+        self.requests = 0
+        flaky = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                flaky.requests += 1
+                status = flaky.statuses.pop(0) if flaky.statuses else 200
+                body = json.dumps([{'status': status}]).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api/v3/ratios/AAPL'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def flaky(monkeypatch):
+    flaky = Flaky()
+    # No backoff between the resends, and count the rate limiter tokens taken
+    monkeypatch.setattr(MeteredRetry, 'get_backoff_time', lambda self: 0)
+    flaky.tokens = []
+    acquire = http_client.rate_limiter.acquire
+    monkeypatch.setattr(http_client.rate_limiter, 'acquire', lambda: (flaky.tokens.append(1), acquire()))
+    telemetry.take_usage()
+    telemetry.reset()
+    yield flaky
+    flaky.server.shutdown()
+    telemetry.take_usage()
+
+
+def statuses():
+    return [call['status'] for call in telemetry.recent_calls()]
+
+
+def test_every_resend_is_throttled_counted_and_recorded(flaky):
+    flaky.statuses = [429, 503]
+    # In a copy of the context, so the run memo does not outlive the test
+    context = contextvars.copy_context()
+    run = context.run(begin_run)
+    response = context.run(http_get, flaky.url)
+    assert response.status_code == 200 and flaky.requests == 3
+    assert len(flaky.tokens) == 3
+    assert telemetry.pending_usage('fmp') == 3
+    assert run.network_calls == 3
+    assert statuses() == [429, 503, 200]
+
+
+def test_exhausted_retries_return_the_last_response(flaky):
+    flaky.statuses = [503] * (MAX_RETRIES + 1)
+    response = http_get(flaky.url)
+    assert response.status_code == 503
+    assert flaky.requests == len(flaky.tokens) == telemetry.pending_usage('fmp') == MAX_RETRIES + 1
+    assert statuses() == [503] * (MAX_RETRIES + 1)
+
+
+def test_failed_connections_are_metered_too(flaky):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    with pytest.raises(requests.ConnectionError):
+        http_get(f'http://127.0.0.1:{port}/api/v3/ratios/AAPL')
+    assert len(flaky.tokens) == telemetry.pending_usage('fmp') == MAX_RETRIES + 1
+    assert len(statuses()) == MAX_RETRIES + 1 and statuses()[-1] == 'ConnectionError'
+
+
+def test_requests_outside_http_get_are_not_metered(flaky):
+    # The Yahoo replay client shares the session but is not an FMP call
+    flaky.statuses = [503]
+    assert session.get(flaky.url, timeout=5).status_code == 200
+    assert flaky.requests == 2
+    assert not flaky.tokens and telemetry.pending_usage('fmp') == 0
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import ohlcv_archive
+from ohlcv_archive import read_archive, read_meta, remove_archive, write_archive
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_archive, 'ARCHIVE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(ohlcv_archive, '_mapped', {})
+    return tmp_path / 'ohlcv'
+
+
+def bars(days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2024-09-30', periods=days, tz='America/New_York').as_unit('ns')
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, days), 'Stock Splits': np.zeros(days),
+    }, index=index)
+
+
+def assert_same_bars(archived, frame):
+    # Archived columns are np.memmap views, so compare values rather than array classes
+    pd.testing.assert_index_equal(archived.index, frame.index)
+    assert list(archived.columns) == list(frame.columns)
+    for column in frame.columns:
+        np.testing.assert_array_equal(np.asarray(archived[column]), frame[column].to_numpy())
+        assert archived[column].dtype == frame[column].dtype
+
+
+def test_round_trip():
+    frame = bars(500)
+    written = write_archive('AAPL', frame)
+    assert_same_bars(written, frame)
+    archived, meta = read_archive('AAPL')
+    assert_same_bars(archived, frame)
+    assert meta['rows'] == 500 and meta['tz'] == 'America/New_York'
+    # Columns are read-only maps of the files, not copies
+    assert not archived['Close'].to_numpy().flags.writeable
+
+
+def test_new_version_supersedes_the_old_one(archive_dir):
+    write_archive('AAPL', bars(100))
+    first = read_meta('AAPL')['version']
+    newer = bars(120, seed=1)
+    write_archive('AAPL', newer)
+    meta = read_meta('AAPL')
+    assert meta['version'] != first and meta['rows'] == 120
+    assert_same_bars(read_archive('AAPL')[0], newer)
+    versions = [name for name in os.listdir(archive_dir / 'AAPL') if (archive_dir / 'AAPL' / name).is_dir()]
+    assert versions == [meta['version']]
+
+
+def test_missing_archive_reads_as_none():
+    assert read_archive('MSFT') is None
+
+
+def test_missing_column_file_reads_as_none(archive_dir):
+    write_archive('AAPL', bars(50))
+    meta = read_meta('AAPL')
+    os.remove(archive_dir / 'AAPL' / meta['version'] / 'Close.npy')
+    ohlcv_archive._mapped.clear()
+    assert read_archive('AAPL') is None
+
+
+def test_corrupt_pointer_reads_as_none(archive_dir):
+    write_archive('AAPL', bars(50))
+    (archive_dir / 'AAPL' / 'current.json').write_text('{"version": ')
+    ohlcv_archive._mapped.clear()
+    assert read_meta('AAPL') is None and read_archive('AAPL') is None
+
+
+def test_write_falls_back_to_the_frame_when_it_cannot_be_read_back(monkeypatch):
+    frame = bars(30)
+    monkeypatch.setattr(ohlcv_archive, 'read_archive', lambda symbol: None)
+    assert write_archive('AAPL', frame) is frame
+
+
+@pytest.mark.parametrize('symbol', ['', '.', '..', '../AAPL', 'A/B', 'A\\B'])
+def test_rejects_symbols_that_are_not_tickers(symbol, archive_dir):
+    write_archive('AAPL', bars(10))
+    with pytest.raises(ValueError):
+        remove_archive(symbol)
+    with pytest.raises(ValueError):
+        write_archive(symbol, bars(10))
+    assert read_meta(symbol) is None
+    assert read_meta('AAPL') is not None and archive_dir.parent.exists()
+
+
+def test_remove_archive(archive_dir):
+    for symbol in ('AAPL', 'BRK-B', '^GSPC'):
+        write_archive(symbol, bars(10))
+    remove_archive('BRK-B')
+    assert read_archive('BRK-B') is None and read_archive('AAPL') is not None
+    remove_archive()
+    assert not archive_dir.exists()
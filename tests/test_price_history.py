@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ohlcv_archive
+import price_history
+from price_history import get_price_history, period_start
+
+
+class Market:
+    # Stands in for yfinance: daily bars up to today, served the way Ticker.history slices them
+    def __init__(self, years=15):
+        rng = np.random.default_rng(0)
+        index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(), periods=years * 252).as_unit('ns')
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        self.bars = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': np.full(len(index), 1_000_000), 'Dividends': 0.0, 'Stock Splits': 0.0,
+        }, index=index)
+        self.calls = []
+
+    def download(self, symbol, **kwargs):
+        self.calls.append(kwargs)
+        if not (kwargs.get('start') or kwargs.get('period')):
+            raise AssertionError(f'history({kwargs}) only returns about a month')
+        bars = self.bars
+        if kwargs.get('start'):
+            bars = bars[bars.index >= pd.Timestamp(kwargs['start'], tz=bars.index.tz)]
+        if kwargs.get('end'):
+            # yfinance's end is exclusive
+            bars = bars[bars.index < pd.Timestamp(kwargs['end'], tz=bars.index.tz)]
+        return bars.copy()
+
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    market = Market()
+    monkeypatch.setattr(price_history, '_download', market.download)
+    monkeypatch.setattr(ohlcv_archive, 'ARCHIVE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(ohlcv_archive, '_mapped', {})
+    price_history._histories.invalidate()
+    yield market
+    price_history._histories.invalidate()
+
+
+def since(market, period):
+    return market.bars[market.bars.index >= period_start(period, market.bars.index.tz)]
+
+
+def assert_bars(frame, expected):
+    pd.testing.assert_index_equal(frame.index, expected.index)
+    np.testing.assert_allclose(frame['Close'].to_numpy(), expected['Close'].to_numpy())
+
+
+def test_first_load_downloads_the_period(market):
+    frame = get_price_history('AAPL', '1y')
+    assert market.calls == [{'start': period_start('1y', None).strftime('%Y-%m-%d')}]
+    assert_bars(frame, since(market, '1y'))
+
+
+def test_shorter_periods_are_sliced_from_the_stored_history(market):
+    get_price_history('AAPL', '1y')
+    frame = get_price_history('AAPL', '1mo')
+    assert len(market.calls) == 1
+    assert_bars(frame, since(market, '1mo'))
+
+
+def test_longer_period_only_downloads_the_older_bars(market):
+    first = get_price_history('AAPL', '1y')
+    frame = get_price_history('AAPL', '5y')
+    assert market.calls[1] == {'start': period_start('5y', first.index.tz).strftime('%Y-%m-%d'),
+                               'end': first.index[0].strftime('%Y-%m-%d')}
+    assert_bars(frame, since(market, '5y'))
+    assert frame.index.is_unique and frame.index.is_monotonic_increasing
+
+
+def test_max_extends_back_to_the_first_bar(market):
+    first = get_price_history('AAPL', '2y')
+    frame = get_price_history('AAPL', 'max')
+    assert market.calls[1] == {'period': 'max', 'end': first.index[0].strftime('%Y-%m-%d')}
+    assert_bars(frame, market.bars)
+    # Full histories go to the archive
+    assert ohlcv_archive.read_meta('AAPL')['rows'] == len(market.bars)
+
+
+def test_refresh_appends_new_bars_and_replaces_the_partial_last_one(market, monkeypatch):
+    get_price_history('AAPL', '1y')
+    stored_last = market.bars.index[-1]
+    # The last bar was still trading when stored; two more have been added since
+    market.bars.loc[stored_last, 'Close'] *= 1.02
+    newer = pd.bdate_range(stored_last, periods=3)[1:]
+    extra = pd.DataFrame({column: market.bars.iloc[-1][column] for column in market.bars}, index=newer)
+    market.bars = pd.concat([market.bars, extra])
+    monkeypatch.setattr(price_history, 'REFRESH_INTERVAL', -1)
+    frame = get_price_history('AAPL', '1y')
+    assert market.calls[-1] == {'start': stored_last.strftime('%Y-%m-%d')}
+    assert_bars(frame, market.bars[market.bars.index >= frame.index[0]])
+    assert frame.index[-1] == newer[-1] and frame.index.is_unique
+
+
+def test_corporate_action_refetches_the_whole_period(market, monkeypatch):
+    get_price_history('AAPL', '1y')
+    # A split on a new bar re-adjusts every earlier price
+    stored_last = market.bars.index[-1]
+    newer = pd.bdate_range(stored_last, periods=2)[1:]
+    market.bars = pd.concat([market.bars, market.bars.iloc[-1:].set_axis(newer)])
+    market.bars[['Open', 'High', 'Low', 'Close']] /= 2
+    market.bars.loc[newer[0], 'Stock Splits'] = 2.0
+    monkeypatch.setattr(price_history, 'REFRESH_INTERVAL', -1)
+    frame = get_price_history('AAPL', '1y')
+    assert market.calls[-2:] == [{'start': stored_last.strftime('%Y-%m-%d')},
+                                 {'start': period_start('1y', None).strftime('%Y-%m-%d')}]
+    assert_bars(frame, since(market, '1y'))
+
+
+def test_unchanged_refresh_keeps_the_stored_frame(market, monkeypatch):
+    first = get_price_history('AAPL', '6mo')
+    monkeypatch.setattr(price_history, 'REFRESH_INTERVAL', -1)
+    frame = get_price_history('AAPL', '6mo')
+    assert len(market.calls) == 2
+    assert_bars(frame, first)
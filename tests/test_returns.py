@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from price_history import PERIODS, PERIOD_OFFSETS, period_start
+from returns import COVERAGE_SLACK, MIN_CAGR_YEARS, TRADING_DAYS, return_statistics, rolling_returns
+
+
+def price_history(days, seed=0, gaps=()):
+    # Business days up to today, like a yfinance history; gaps are (start, stop) bar ranges set to NaN
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(), periods=days)
+    closes = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+    for start, stop in gaps:
+        closes[start:stop] = np.nan
+    return pd.DataFrame({'Close': closes}, index=index)
+
+
+def reference_statistics(stock_prices, period):
+    # The same figures the plain pandas way, one window at a time
+    closes = stock_prices['Close']
+    if PERIOD_OFFSETS[period] is not None:
+        start = period_start(period, closes.index.tz)
+        if closes.index[0] > start + COVERAGE_SLACK:
+            return [np.nan] * 4
+        closes = closes[closes.index >= start]
+    total_return = closes.iloc[-1] / closes.iloc[0] - 1
+    years = (closes.index[-1] - closes.index[0]).days / 365.25
+    cagr = (1 + total_return) ** (1 / years) - 1 if years >= MIN_CAGR_YEARS else np.nan
+    daily_returns = closes.pct_change(fill_method=None).dropna()
+    volatility = daily_returns.std() * np.sqrt(TRADING_DAYS) if len(daily_returns) > 1 else np.nan
+    drawdown = (closes / closes.cummax() - 1).min()
+    return [total_return, cagr, volatility, drawdown]
+
+
+def reference_rolling(stock_prices, period):
+    closes = stock_prices['Close']
+    if PERIOD_OFFSETS[period] is None:
+        return closes / closes.iloc[0] - 1
+    values = []
+    for at, close in closes.items():
+        lookback = at - PERIOD_OFFSETS[period]
+        values.append(close / closes[closes.index >= lookback].iloc[0] - 1 if lookback >= closes.index[0] else np.nan)
+    return pd.Series(values, index=closes.index)
+
+
+HISTORIES = {
+    'long': dict(days=3000),
+    'gaps': dict(days=3000, gaps=[(100, 140), (2500, 2503), (2990, 2991)]),
+    'short': dict(days=40),
+    'under a year': dict(days=240, gaps=[(50, 60)]),
+}
+
+
+@pytest.mark.parametrize('name', HISTORIES)
+def test_return_statistics_match_pandas(name):
+    stock_prices = price_history(**HISTORIES[name])
+    statistics = return_statistics(stock_prices)
+    expected = pd.DataFrame([reference_statistics(stock_prices, period) for period in PERIODS],
+                            index=PERIODS, columns=statistics.columns)
+    pd.testing.assert_frame_equal(statistics, expected, rtol=1e-6)
+
+
+def test_return_statistics_leave_uncovered_periods_empty():
+    statistics = return_statistics(price_history(40))
+    assert statistics.loc[['1wk', '1mo', 'max'], ['Return', 'Volatility', 'Max Drawdown']].notna().all(axis=None)
+    assert statistics.loc[['3mo', '6mo', '1y', '2y', '5y', '10y']].isna().all(axis=None)
+    assert statistics['CAGR'].isna().all()
+
+
+def test_return_statistics_of_a_single_bar():
+    assert return_statistics(price_history(1)).isna().all(axis=None)
+
+
+@pytest.mark.parametrize('name', ['gaps', 'short'])
+def test_rolling_returns_match_pandas(name):
+    stock_prices = price_history(**dict(HISTORIES[name], days=min(HISTORIES[name]['days'], 600)))
+    rolling = rolling_returns(stock_prices)
+    for period in PERIODS:
+        pd.testing.assert_series_equal(rolling[period], reference_rolling(stock_prices, period), check_names=False, rtol=1e-9)
+
+
+def test_return_statistics_of_a_stale_history():
+    # Delisted in 2023: the recent periods start after the last bar
+    index = pd.bdate_range('2020-01-01', '2023-01-01', tz='America/New_York')
+    stock_prices = pd.DataFrame({'Close': np.linspace(10, 20, len(index))}, index=index)
+    statistics = return_statistics(stock_prices)
+    assert statistics.loc[['1wk', '1mo', '3mo', '6mo', '1y', '2y']].isna().all(axis=None)
+    assert statistics.loc['max', 'Return'] == pytest.approx(1.0)
+    expected = pd.DataFrame([reference_statistics(stock_prices, period) for period in ['5y', 'max']],
+                            index=['5y', 'max'], columns=statistics.columns)
+    pd.testing.assert_frame_equal(statistics.loc[['5y', 'max']], expected, rtol=1e-6)
@@ -0,0 +1,69 @@
+import contextvars
+from types import SimpleNamespace
+import pytest
+import streamlit as st
+import sections
+from run_memo import begin_run, count_network_call, current_run
+from telemetry import recent_runs
+
+
+@pytest.fixture
+def fragment_run(monkeypatch):
+    # Decorate without a script context: st.fragment becomes a plain call, and the context
+    # says whether this is a fragment rerun
+    monkeypatch.setattr(st, 'fragment', lambda block: block)
+    flushes = []
+    monkeypatch.setattr(sections, 'flush_usage', lambda: flushes.append(True))
+
+    def run(block, fragment_ids):
+        monkeypatch.setattr(sections, 'get_script_run_ctx', lambda: SimpleNamespace(fragment_ids_this_run=fragment_ids))
+        return contextvars.copy_context().run(sections.tracked_fragment('Valuation Metrics')(block))
+    return run, flushes
+
+
+def test_fragment_rerun_records_its_own_run(fragment_run):
+    run, flushes = fragment_run
+
+    def metric_comparison():
+        count_network_call()
+        return current_run()
+
+    def page_then_fragment():
+        return begin_run(), run(metric_comparison, ['fragment-id'])
+
+    page_memo, memo = contextvars.copy_context().run(page_then_fragment)
+    assert memo is not page_memo
+    assert memo.network_calls == 1
+    assert recent_runs()[-1]['page'] == 'Valuation Metrics: metric_comparison'
+    assert recent_runs()[-1]['network_calls'] == 1
+    assert recent_runs()[-1]['status'] == 'ok'
+    assert flushes == [True]
+
+
+def test_fragment_error_is_recorded(fragment_run):
+    run, flushes = fragment_run
+
+    def metric_comparison():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run(metric_comparison, ['fragment-id'])
+    assert recent_runs()[-1]['status'] == 'error'
+    assert flushes == [True]
+
+
+def test_full_rerun_leaves_the_page_run_alone(fragment_run):
+    run, flushes = fragment_run
+    runs_before = len(recent_runs())
+
+    def metric_comparison():
+        return current_run()
+
+    def page():
+        memo = begin_run()
+        return memo, run(metric_comparison, None)
+
+    page_memo, memo = contextvars.copy_context().run(page)
+    assert memo is page_memo
+    assert len(recent_runs()) == runs_before
+    assert flushes == []
@@ -0,0 +1,122 @@
+import time
+import pytest
+import store
+import telemetry
+from cache import ENDPOINT_TTLS, response_cache
+from store import (RETRY_TTL, flush_usage, read_fundamentals, read_usage, refreshing_ahead, stored_fetch,
+                   write_fundamentals)
+
+TTL = ENDPOINT_TTLS['ratios']
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(store, 'DB_PATH', str(tmp_path / 'stockly.db'))
+    monkeypatch.setattr(store._local, 'connection', None, raising=False)
+    response_cache.invalidate()
+    yield
+    response_cache.invalidate()
+    store._local.connection.close()
+
+
+def age(endpoint, symbol, period, seconds):
+    connection = store.get_connection()
+    with connection:
+        connection.execute('UPDATE fundamentals SET checked_at = checked_at - ? WHERE endpoint = ? AND symbol = ? AND period = ?',
+                           (seconds, endpoint, symbol, period))
+
+
+def memory_ttl(endpoint, symbol, period):
+    return response_cache._entries[(endpoint, symbol, period)][0] - time.monotonic()
+
+
+class Upstream:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_miss_is_fetched_and_stored():
+    upstream = Upstream([{'revenue': 1}])
+    assert stored_fetch('ratios', 'AAPL', 'annual', upstream) == [{'revenue': 1}]
+    assert read_fundamentals('ratios', 'AAPL', 'annual')['payload'] == [{'revenue': 1}]
+    assert TTL - 5 < memory_ttl('ratios', 'AAPL', 'annual') <= TTL
+
+
+def test_fresh_copy_is_served_for_its_remaining_lifetime():
+    write_fundamentals('ratios', 'AAPL', 'annual', [{'revenue': 1}])
+    age('ratios', 'AAPL', 'annual', TTL - 600)
+    upstream = Upstream()
+    assert stored_fetch('ratios', 'AAPL', 'annual', upstream) == [{'revenue': 1}]
+    assert upstream.calls == 0
+    assert 590 < memory_ttl('ratios', 'AAPL', 'annual') <= 600
+
+
+def test_unchanged_revalidation_only_touches_checked_at():
+    write_fundamentals('ratios', 'AAPL', 'annual', [{'revenue': 1}])
+    age('ratios', 'AAPL', 'annual', TTL + 1)
+    before = read_fundamentals('ratios', 'AAPL', 'annual')
+    assert stored_fetch('ratios', 'AAPL', 'annual', Upstream([{'revenue': 1}])) == [{'revenue': 1}]
+    after = read_fundamentals('ratios', 'AAPL', 'annual')
+    assert after['checksum'] == before['checksum'] and after['fetched_at'] == before['fetched_at']
+    assert after['checked_at'] > before['checked_at'] + TTL
+
+
+def test_changed_payload_replaces_the_stored_copy():
+    write_fundamentals('ratios', 'AAPL', 'annual', [{'revenue': 1}])
+    age('ratios', 'AAPL', 'annual', TTL + 1)
+    before = read_fundamentals('ratios', 'AAPL', 'annual')
+    assert stored_fetch('ratios', 'AAPL', 'annual', Upstream([{'revenue': 2}])) == [{'revenue': 2}]
+    after = read_fundamentals('ratios', 'AAPL', 'annual')
+    assert after['payload'] == [{'revenue': 2}] and after['checksum'] != before['checksum']
+    assert after['fetched_at'] > before['fetched_at']
+
+
+@pytest.mark.parametrize('response', [RuntimeError('timeout'), [], {'Error Message': 'Limit Reach'}])
+def test_stale_copy_is_served_briefly_when_the_refetch_fails(response):
+    write_fundamentals('ratios', 'AAPL', 'annual', [{'revenue': 1}])
+    age('ratios', 'AAPL', 'annual', TTL + 1)
+    before = read_fundamentals('ratios', 'AAPL', 'annual')
+    assert stored_fetch('ratios', 'AAPL', 'annual', Upstream(response)) == [{'revenue': 1}]
+    assert RETRY_TTL - 5 < memory_ttl('ratios', 'AAPL', 'annual') <= RETRY_TTL
+    # Nothing learned, so the stored copy stays stale and is retried next time
+    assert read_fundamentals('ratios', 'AAPL', 'annual')['checked_at'] == before['checked_at']
+
+
+def test_failures_without_a_stored_copy():
+    with pytest.raises(RuntimeError):
+        stored_fetch('ratios', 'AAPL', 'annual', Upstream(RuntimeError('timeout')))
+    assert stored_fetch('ratios', 'NOPE', 'annual', Upstream([])) == []
+    assert read_fundamentals('ratios', 'NOPE', 'annual') is None
+    assert ('ratios', 'NOPE', 'annual') not in response_cache._entries
+
+
+def test_refreshing_ahead_revalidates_copies_about_to_expire():
+    write_fundamentals('ratios', 'AAPL', 'annual', [{'revenue': 1}])
+    age('ratios', 'AAPL', 'annual', TTL - 300)
+    stored_fetch('ratios', 'AAPL', 'annual', Upstream())
+    upstream = Upstream([{'revenue': 2}])
+    with refreshing_ahead(600):
+        assert stored_fetch('ratios', 'AAPL', 'annual', upstream) == [{'revenue': 2}]
+    assert upstream.calls == 1
+    # Written back over the memory copy the pages read
+    assert stored_fetch('ratios', 'AAPL', 'annual', Upstream()) == [{'revenue': 2}]
+
+
+def test_usage_is_counted_in_memory_and_flushed():
+    telemetry.take_usage()
+    telemetry.count_usage('fmp', 3)
+    assert read_usage('fmp') == 3
+    flush_usage()
+    assert telemetry.pending_usage('fmp') == 0 and read_usage('fmp') == 3
+    telemetry.count_usage('fmp')
+    flush_usage()
+    assert read_usage('fmp') == 4
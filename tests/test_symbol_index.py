@@ -0,0 +1,98 @@
+import time
+import pytest
+import symbol_index
+from symbol_index import SymbolIndex, get_symbol_index, normalize_name, trigrams
+
+LISTING = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.'},
+    {'symbol': 'A', 'name': 'Agilent Technologies, Inc.'},
+    {'symbol': 'AA', 'name': 'Alcoa Corporation'},
+    {'symbol': 'AA.L', 'name': 'Anglo American plc'},
+    {'symbol': 'AAL', 'name': 'American Airlines Group Inc.'},
+    {'symbol': 'MSFT', 'name': 'Microsoft Corporation'},
+    {'symbol': 'APLE', 'name': 'Apple Hospitality REIT, Inc.'},
+    {'symbol': 'NVDA', 'name': 'NVIDIA Corporation'},
+    {'symbol': '', 'name': 'No symbol'},
+    {'symbol': 'X', 'name': None},
+]
+
+
+def symbols(entries):
+    return [entry['symbol'] for entry in entries]
+
+
+def test_normalize_and_trigrams():
+    assert normalize_name('Alcoa  Corp.') == 'alcoa corp'
+    assert normalize_name(None) == ''
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+
+
+def test_entries_without_symbol_are_dropped():
+    index = SymbolIndex(LISTING)
+    assert len(index) == len(LISTING) - 1
+    assert 'No symbol' not in [entry['name'] for entry in index.entries]
+
+
+def test_exact_symbol_comes_first():
+    assert symbols(SymbolIndex(LISTING).search('aa'))[0] == 'AA'
+    assert symbols(SymbolIndex(LISTING).search('NVDA')) == ['NVDA']
+
+
+def test_prefix_ranks_shorter_symbols_first():
+    assert symbols(SymbolIndex(LISTING).search('A'))[:5] == ['A', 'AA', 'AAL', 'AA.L', 'AAPL']
+
+
+def test_trie_nodes_keep_their_best_few():
+    index = SymbolIndex(LISTING, per_node=2)
+    assert symbols([index.entries[i] for i in index.symbol_prefix('A')]) == ['A', 'AA']
+    assert index.symbol_prefix('ZZZ') == []
+
+
+def test_results_are_unique_and_limited():
+    index = SymbolIndex(LISTING)
+    results = symbols(index.search('aapl'))
+    assert results.count('AAPL') == 1
+    assert len(index.search('a', limit=3)) == 3
+
+
+def test_names_match_fuzzily():
+    assert symbols(SymbolIndex(LISTING).search('appel'))[:2] == ['AAPL', 'APLE']
+    assert symbols(SymbolIndex(LISTING).search('microsoft')) == ['MSFT']
+    assert 'AAL' in symbols(SymbolIndex(LISTING).search('american airlines'))
+
+
+def test_short_queries_only_match_symbols():
+    assert symbols(SymbolIndex(LISTING).search('ap')) == ['APLE']
+    assert SymbolIndex(LISTING).search('  ') == []
+    assert SymbolIndex(LISTING).search(None) == []
+
+
+def test_weak_name_matches_are_dropped():
+    assert SymbolIndex(LISTING).search('zebra holdings') == []
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(symbol_index, '_index', None)
+    monkeypatch.setattr(symbol_index, '_built_at', 0.0)
+    monkeypatch.setattr(symbol_index, '_rebuilding', False)
+
+
+def failing_listing():
+    raise RuntimeError('listing unavailable')
+
+
+def test_failed_listing_is_retried_soon(fresh_index):
+    index = get_symbol_index(failing_listing)
+    assert len(index) == 0
+    # Due for a rebuild once RETRY_INTERVAL has passed, not a whole REFRESH_INTERVAL
+    age = time.monotonic() - symbol_index._built_at
+    assert symbol_index.REFRESH_INTERVAL - symbol_index.RETRY_INTERVAL <= age < symbol_index.REFRESH_INTERVAL
+
+
+def test_rebuild_keeps_the_old_listing_when_the_new_one_fails(fresh_index):
+    index = get_symbol_index(lambda: LISTING)
+    symbol_index._rebuild(failing_listing)
+    assert symbol_index._index is index
+    symbol_index._rebuild(lambda: LISTING[:2])
+    assert len(symbol_index._index) == 2
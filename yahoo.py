@@ -0,0 +1,121 @@
+import json
+import os
+from urllib.parse import urlencode
+import pandas as pd
+import yfinance as yf
+from cache import TTLCache, ENDPOINT_TTLS, cached_fetch, count_result_bytes, response_cache
+from run_memo import count_network_call
+from http_client import TIMEOUT, session
+from telemetry import payload_size, timed_call
+
+# yf.Ticker memoizes info and statements on the object itself, so a Ticker must not
+# outlive the shortest payload TTL or refreshes would be served from its stale copy
+TICKER_TTL = ENDPOINT_TTLS['yf-info']
+_tickers = TTLCache(int(os.environ.get('STOCKLY_TICKER_CACHE_SIZE', 128)))
+# Point at benchmarks/standin_server.py to replay recorded Yahoo data instead of calling Yahoo
+YAHOO_BASE_URL = os.environ.get('YAHOO_BASE_URL', '').rstrip('/')
+
+
+def frame_to_payload(frame):
+    # DataFrames travel as pandas' 'split' JSON; datetime labels go as ISO strings in UTC
+    # with the index time zone alongside, since yfinance indexes bars in exchange time
+    payload = json.loads(frame.to_json(orient='split', date_format='iso', date_unit='ns', double_precision=15))
+    payload['index_dates'] = isinstance(frame.index, pd.DatetimeIndex)
+    payload['column_dates'] = isinstance(frame.columns, pd.DatetimeIndex)
+    payload['tz'] = str(frame.index.tz) if payload['index_dates'] and frame.index.tz is not None else None
+    return payload
+
+
+def frame_from_payload(payload):
+    index = pd.Index(payload['index'])
+    if payload['index_dates']:
+        index = pd.to_datetime(index, utc=payload['tz'] is not None)
+        if payload['tz']:
+            index = index.tz_convert(payload['tz'])
+    columns = pd.Index(payload['columns'])
+    if payload['column_dates']:
+        columns = pd.to_datetime(columns)
+    frame = pd.DataFrame(payload['data'], index=index, columns=columns)
+    return frame.infer_objects()
+
+
+class ReplayTicker:
+    # The part of yf.Ticker the app uses, served by YAHOO_BASE_URL
+    def __init__(self, symbol):
+        self.ticker = symbol
+
+    def _get(self, kind, **params):
+        params = {key: value for key, value in params.items() if value is not None}
+        response = session.get(f'{YAHOO_BASE_URL}/yahoo/{kind}/{self.ticker}?{urlencode(params)}', timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def get_info(self):
+        return self._get('info')
+
+    def get_income_stmt(self, freq='yearly'):
+        return frame_from_payload(self._get('income_stmt', freq=freq))
+
+    def get_balance_sheet(self, freq='yearly'):
+        return frame_from_payload(self._get('balance_sheet', freq=freq))
+
+    def get_cashflow(self, freq='yearly'):
+        return frame_from_payload(self._get('cashflow', freq=freq))
+
+    def get_earnings_history(self):
+        return frame_from_payload(self._get('earnings_history'))
+
+    def history(self, period=None, start=None, end=None):
+        return frame_from_payload(self._get('history', period=period, start=start, end=end))
+
+
+def get_ticker(symbol):
+    ticker = _tickers.get(symbol)
+    if ticker is None:
+        ticker = ReplayTicker(symbol) if YAHOO_BASE_URL else yf.Ticker(symbol)
+        _tickers.set(symbol, ticker, TICKER_TTL)
+    return ticker
+
+
+def yahoo_fetch(kind, symbol, period, fetch, ttl=None):
+    # fetch receives the shared Ticker; results go through the same response cache,
+    # per-rerun memo and in-flight coalescing as the FMP endpoints. The returned
+    # objects are shared between sessions, so callers copy before mutating them.
+    def load():
+        count_network_call()
+        with timed_call(kind, symbol) as call:
+            data = fetch(get_ticker(symbol))
+            call['size'] = payload_size(data)
+        count_result_bytes(call['size'])
+        return data
+
+    return cached_fetch(kind, symbol, period, load, ttl)
+
+
+def get_info(symbol):
+    return yahoo_fetch('yf-info', symbol, None, lambda ticker: ticker.get_info())
+
+
+def get_income_stmt(symbol, freq):
+    return yahoo_fetch('yf-income-stmt', symbol, freq, lambda ticker: ticker.get_income_stmt(freq=freq))
+
+
+def get_balance_sheet(symbol, freq):
+    return yahoo_fetch('yf-balance-sheet', symbol, freq, lambda ticker: ticker.get_balance_sheet(freq=freq))
+
+
+def get_cashflow(symbol, freq):
+    return yahoo_fetch('yf-cashflow', symbol, freq, lambda ticker: ticker.get_cashflow(freq=freq))
+
+
+def get_earnings_history(symbol):
+    return yahoo_fetch('yf-earnings-history', symbol, None, lambda ticker: ticker.get_earnings_history())
+
+
+def invalidate_symbol(symbol, kind=None):
+    # Drop cached Yahoo data for a symbol (one kind, or all of them and the Ticker itself)
+    if kind is None:
+        _tickers.invalidate(lambda key: key == symbol)
+        response_cache.invalidate(lambda key: key[0].startswith('yf-') and key[1] == symbol)
+    else:
+        response_cache.invalidate(lambda key: key[0] == kind and key[1] == symbol)